@@ -6,12 +6,13 @@ import logging
 import re
 import uuid
 from abc import abstractmethod
-from typing import List, Union
+from typing import Dict, List, Union
 
 from tenacity import RetryError
 
 from .backends import IntelligenceBackend, load_backend
-from .config import AgentConfig, BackendConfig, Configurable
+from .config import AgentConfig, BackendConfig, Config, Configurable
+from .context import ContextPolicy
 from .message import SYSTEM_NAME, Message
 
 # A special signal sent by the player to indicate that it is not possible to continue the conversation, and it requests to end the conversation.
@@ -56,6 +57,7 @@ class Player(Agent):
         role_desc: str,
         backend: Union[BackendConfig, IntelligenceBackend],
         global_prompt: str = None,
+        context_policy: Union[Config, ContextPolicy] = None,
         **kwargs,
     ):
         """
@@ -66,6 +68,7 @@ class Player(Agent):
             role_desc (str): Description of the player's role.
             backend (Union[BackendConfig, IntelligenceBackend]): The backend that will be used for decision making. It can be either a LLM backend or a Human backend.
             global_prompt (str): A universal prompt that applies to all players. Defaults to None.
+            context_policy (Union[Config, ContextPolicy]): If specified, bounds the observation sent to the backend. Defaults to None.
         """
 
         if isinstance(backend, BackendConfig):
@@ -78,6 +81,9 @@ class Player(Agent):
                 f"backend must be a BackendConfig or an IntelligenceBackend, but got {type(backend)}"
             )
 
+        if isinstance(context_policy, Config):
+            context_policy = ContextPolicy.from_config(context_policy)
+
         assert (
             name != SYSTEM_NAME
         ), f"Player name cannot be {SYSTEM_NAME}, which is reserved for the system."
@@ -92,26 +98,35 @@ class Player(Agent):
         )
 
         self.backend = backend
+        self.context_policy = context_policy
         self.context = [{"role": "USER", "message": role_desc}]
 
     def to_config(self) -> AgentConfig:
-        return AgentConfig(
+        config = AgentConfig(
             name=self.name,
             role_desc=self.role_desc,
             backend=self.backend.to_config(),
             global_prompt=self.global_prompt,
         )
+        if self.context_policy is not None:
+            config["context_policy"] = self.context_policy.to_config()
+        return config
 
-    def act(self, observation: List[Message]) -> str:
+    def act(
+        self, observation: List[Message], new_messages: List[Message] = None
+    ) -> str:
         """
         Take an action based on the observation (Generate a response), which can later be parsed to actual actions that affect the game dynamics.
 
         Parameters:
             observation (List[Message]): The messages that the player has observed from the environment.
+            new_messages (List[Message]): The messages of the observation that were not sent to the player before. Used by stateful backends.
 
         Returns:
             str: The action (response) of the player.
         """
+        if self.context_policy is not None:
+            observation = self.context_policy.apply(self.name, observation)
         try:
             response = self.backend.query(
                 agent_name=self.name,
@@ -120,6 +135,7 @@ class Player(Agent):
                 global_prompt=self.global_prompt,
                 context=self.context,
                 request_msg=None,
+                new_messages=new_messages,
             )
         except RetryError as e:
             err_msg = f"Agent {self.name} failed to generate a response. Error: {e.last_attempt.exception()}. Sending signal to end the conversation."
@@ -128,10 +144,14 @@ class Player(Agent):
 
         return response
 
-    def __call__(self, observation: List[Message]) -> str:
-        return self.act(observation)
+    def __call__(
+        self, observation: List[Message], new_messages: List[Message] = None
+    ) -> str:
+        return self.act(observation, new_messages=new_messages)
 
-    async def async_act(self, observation: List[Message]) -> str:
+    async def async_act(
+        self, observation: List[Message], new_messages: List[Message] = None
+    ) -> str:
         """
         Async version of act().
 
@@ -139,17 +159,22 @@ class Player(Agent):
 
         Parameters:
             observation (List[Message]): The messages that the player has observed from the environment.
+            new_messages (List[Message]): The messages of the observation that were not sent to the player before. Used by stateful backends.
 
         Returns:
             str: The action (response) of the player.
         """
+        if self.context_policy is not None:
+            observation = self.context_policy.apply(self.name, observation)
         try:
-            response = self.backend.async_query(
+            response = await self.backend.async_query(
                 agent_name=self.name,
                 role_desc=self.role_desc,
                 history_messages=observation,
                 global_prompt=self.global_prompt,
+                context=self.context,
                 request_msg=None,
+                new_messages=new_messages,
             )
         except RetryError as e:
             err_msg = f"Agent {self.name} failed to generate a response. Error: {e.last_attempt.exception()}. Sending signal to end the conversation."
@@ -158,6 +183,89 @@ class Player(Agent):
 
         return response
 
+    def sample_actions(
+        self,
+        observation: List[Message],
+        new_messages: List[Message] = None,
+        num_samples: int = 1,
+    ) -> List[str]:
+        """
+        Sample several candidate actions for the same observation (see IntelligenceBackend.query_samples).
+
+        Parameters:
+            observation (List[Message]): The messages that the player has observed from the environment.
+            new_messages (List[Message]): The messages of the observation that were not sent to the player before.
+            num_samples (int): The number of candidates requested. Stateful backends return a single candidate.
+
+        Returns:
+            List[str]: The candidate actions (responses) of the player.
+        """
+        if num_samples == 1:
+            return [self.act(observation, new_messages=new_messages)]
+        if self.context_policy is not None:
+            observation = self.context_policy.apply(self.name, observation)
+        try:
+            responses = self.backend.query_samples(
+                num_samples,
+                agent_name=self.name,
+                role_desc=self.role_desc,
+                history_messages=observation,
+                global_prompt=self.global_prompt,
+                context=self.context,
+                request_msg=None,
+                new_messages=new_messages,
+            )
+        except RetryError as e:
+            err_msg = f"Agent {self.name} failed to generate a response. Error: {e.last_attempt.exception()}. Sending signal to end the conversation."
+            logging.warning(err_msg)
+            responses = [SIGNAL_END_OF_CONVERSATION + err_msg]
+
+        return responses
+
+    async def async_sample_actions(
+        self,
+        observation: List[Message],
+        new_messages: List[Message] = None,
+        num_samples: int = 1,
+    ) -> List[str]:
+        """Async version of sample_actions()."""
+        if num_samples == 1:
+            return [await self.async_act(observation, new_messages=new_messages)]
+        if self.context_policy is not None:
+            observation = self.context_policy.apply(self.name, observation)
+        try:
+            responses = await self.backend.async_query_samples(
+                num_samples,
+                agent_name=self.name,
+                role_desc=self.role_desc,
+                history_messages=observation,
+                global_prompt=self.global_prompt,
+                context=self.context,
+                request_msg=None,
+                new_messages=new_messages,
+            )
+        except RetryError as e:
+            err_msg = f"Agent {self.name} failed to generate a response. Error: {e.last_attempt.exception()}. Sending signal to end the conversation."
+            logging.warning(err_msg)
+            responses = [SIGNAL_END_OF_CONVERSATION + err_msg]
+
+        return responses
+
+    def get_state(self) -> Dict:
+        """The state of the player's backend and context policy, to checkpoint the game."""
+        return {
+            "backend": self.backend.get_state(),
+            "context_policy": (
+                self.context_policy.get_state() if self.context_policy is not None else None
+            ),
+        }
+
+    def set_state(self, state: Dict):
+        """Restore a state returned by get_state."""
+        self.backend.set_state(state["backend"])
+        if self.context_policy is not None and state["context_policy"] is not None:
+            self.context_policy.set_state(state["context_policy"])
+
     def reset(self):
         """
         Reset the player's backend in case they are not stateless.
@@ -165,6 +273,8 @@ class Player(Agent):
         This is usually called at the end of each episode.
         """
         self.backend.reset()
+        if self.context_policy is not None:
+            self.context_policy.reset()
 
 
 class Moderator(Player):
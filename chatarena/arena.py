@@ -6,22 +6,57 @@
 #
 # You can use ctrl+f to find the other EDIT tags before the functions we've changed. 
 
+import asyncio
 import csv
 import json
 import logging
+import os
+import pickle
+import time
 import uuid
-from typing import Dict, List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple, Union
 
 from .agent import Player
 from .backends import Human
 from .config import ArenaConfig
-from .environments import Environment, TimeStep, load_environment
+from .environments import ENV_REGISTRY, Environment, TimeStep, load_environment
+from .hooks import ArenaHook, HookRegistry
+from .message import MODERATOR_NAME, SYSTEM_NAME
+
+
+# Version of the checkpoint format, see Arena.checkpoint
+CHECKPOINT_VERSION = 3
 
 
 class TooManyInvalidActions(Exception):
     pass
 
 
+class _CheckpointPickler(pickle.Pickler):
+    """Pickles the prompts written by the previous records of a checkpoint as their ID (see Arena.checkpoint)."""
+
+    def __init__(self, file, prompt_ids: Dict[str, int]):
+        super().__init__(file)
+        self.prompt_ids = prompt_ids
+
+    def persistent_id(self, obj):
+        if type(obj) is str:
+            return self.prompt_ids.get(obj)
+        return None
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+    """Reads the prompts pickled as their ID by _CheckpointPickler."""
+
+    def __init__(self, file, prompts: List[str]):
+        super().__init__(file)
+        self.prompts = prompts
+
+    def persistent_load(self, pid):
+        return self.prompts[pid]
+
+
 class Arena:
     """Utility class that manages the game environment and players."""
 
@@ -36,6 +71,18 @@ class Arena:
         self.current_timestep = environment.reset()
         self.uuid = uuid.uuid4()  # Generate a unique id for the game
         self.invalid_actions_retry = 5
+        self.num_action_samples = 1  # Candidate actions sampled per query, see _valid_action
+        self._observation_cursors = {}  # Cursor key -> cursor of the messages already sent, see _cursor_key
+        self._pending_cursors = {}  # Cursor key -> cursor after the current observation, until the action is accepted
+        self.num_steps = 0  # Number of actions of the players since the last reset, see _end_step
+        self.checkpoint_path = None  # If set, the game is checkpointed there every checkpoint_interval steps
+        self.checkpoint_interval = 1
+        self._checkpoint_log = None  # (path, message pool, messages saved, pool offset, prompt IDs), see checkpoint
+        self.hooks = HookRegistry()  # Callbacks of the step lifecycle events, see chatarena.hooks
+
+    def add_hook(self, hook: ArenaHook) -> ArenaHook:
+        """Register the event methods of a hook (see HookRegistry.add)."""
+        return self.hooks.add(hook)
 
     @property
     def num_players(self):
@@ -45,6 +92,12 @@ class Arena:
     def name_to_player(self) -> Dict[str, Player]:
         return {player.name: player for player in self.players}
 
+    def get_metrics(self) -> Dict:
+        """The metrics of the environment, with the metrics of the hooks (see ArenaHook.get_metrics)."""
+        metrics = dict(self.environment.get_metrics() or {})
+        metrics.update(self.hooks.get_metrics())
+        return metrics
+
     def reset(self) -> TimeStep:
         # Reset the environment
         self.current_timestep = self.environment.reset()
@@ -53,39 +106,383 @@ class Arena:
             player.reset()
         # Reset the uuid
         self.uuid = uuid.uuid4()
+        self._observation_cursors = {}
+        self._pending_cursors = {}
+        self.num_steps = 0
+        self._checkpoint_log = None
         return self.current_timestep
 
-    def step(self) -> TimeStep:
-        """Take a step in the game: one player takes an action and the environment updates."""
-        player_name = self.environment.get_next_player()
+    def _cursor_key(self, player: Player) -> str:
+        """
+        The key of the cursor of the messages already sent to a player.
+
+        A stateful backend shared by several players (e.g. one Cohere session for all the players of a game) holds a
+        single conversation, which already received the messages sent with the queries of the other players: the
+        players share one cursor, under the name of the first of them. Otherwise, each player has its own cursor.
+        """
+        if player.backend.stateful:
+            for other in self.players:
+                if other.backend is player.backend:
+                    return other.name
+        return player.name
+
+    def _observe(self, player_name: str = None):
+        """Get a player (the next player by default), its observation and the messages it has not been sent yet."""
+        if player_name is None:
+            player_name = self.environment.get_next_player()
+        self.hooks.emit("before_observation", self, player_name)
         player = self.name_to_player[player_name]  # get the player object
         observation = self.environment.get_observation(
             player_name
         )  # get the observation for the player
+        cursor_key = self._cursor_key(player)
+        new_messages, self._pending_cursors[cursor_key] = (
+            self.environment.get_new_messages(
+                player_name, self._observation_cursors.get(cursor_key, 0)
+            )
+        )  # get the messages the player has not been sent yet
+        return player, observation, new_messages
 
-        timestep = None
+    def _accept_observations(self, player_names: List[str]):
+        """
+        Advance the cursors of the players whose actions were accepted past their observations.
+
+        Until then, a player whose query failed (e.g. too many invalid actions, or a backend error) is sent the same
+        new messages when it is observed again.
+        """
+        for player_name in player_names:
+            cursor_key = self._cursor_key(self.name_to_player[player_name])
+            if cursor_key in self._pending_cursors:  # Players sharing a cursor are accepted once
+                self._observation_cursors[cursor_key] = self._pending_cursors.pop(cursor_key)
+
+    def _too_many_invalid_actions(self, player_name: str):
+        """Terminate the game when the player made invalid actions for too many times."""
+        warning_msg = f"{player_name} has made invalid actions for {self.invalid_actions_retry} times. Terminating the game."
+        logging.warning(warning_msg)
+        raise TooManyInvalidActions(warning_msg)
+
+    def _valid_action(self, player: Player, observation, new_messages) -> str:
+        """
+        Query a player until it takes a valid action, for at most invalid_actions_retry times.
+
+        With num_action_samples > 1, each query samples several candidates and the first valid one is taken.
+        """
         for i in range(
             self.invalid_actions_retry
         ):  # try to take an action for a few times
-            action = player(observation)  # take an action
-            if self.environment.check_action(action, player_name):  # action is valid
-                timestep = self.environment.step(
-                    player_name, action
-                )  # update the environment
-                break
-            else:  # action is invalid
-                logging.warning(f"{player_name} made an invalid action {action}")
-                continue
+            self.hooks.emit("before_query", self, player, observation)
+            start = time.perf_counter()
+            actions = player.sample_actions(
+                observation, new_messages=new_messages, num_samples=self.num_action_samples
+            )  # take an action
+            self.hooks.emit("after_query", self, player, actions, time.perf_counter() - start, i)
+            for action in actions:
+                if self.environment.check_action(action, player.name):  # action is valid
+                    return action
+                logging.warning(f"{player.name} made an invalid action {action}")
+
+        self._too_many_invalid_actions(player.name)
+
+    async def _async_valid_action(self, player: Player, observation, new_messages) -> str:
+        """Async version of _valid_action()."""
+        for i in range(self.invalid_actions_retry):
+            self.hooks.emit("before_query", self, player, observation)
+            start = time.perf_counter()
+            actions = await player.async_sample_actions(
+                observation, new_messages=new_messages, num_samples=self.num_action_samples
+            )
+            self.hooks.emit("after_query", self, player, actions, time.perf_counter() - start, i)
+            for action in actions:
+                if self.environment.check_action(action, player.name):
+                    return action
+                logging.warning(f"{player.name} made an invalid action {action}")
+
+        self._too_many_invalid_actions(player.name)
+
+    def _get_simultaneous_players(self) -> List[str]:
+        """Get the players that act simultaneously in the next step, if any."""
+        player_names = self.environment.get_simultaneous_players()
+        # Human players answer in the CLI one at a time (see HumanBackendError): play the phase sequentially
+        if any(isinstance(self.name_to_player[name].backend, Human) for name in player_names):
+            return []
+        return player_names
+
+    def _observe_simultaneous(self, player_names: List[str]) -> Dict[str, tuple]:
+        """
+        Get the observations of the players that act simultaneously, before any of them acts.
 
-        if (
-            timestep is None
-        ):  # if the player made invalid actions for too many times, terminate the game
-            warning_msg = f"{player_name} has made invalid actions for {self.invalid_actions_retry} times. Terminating the game."
-            logging.warning(warning_msg)
-            raise TooManyInvalidActions(warning_msg)
+        Players that share a cursor (see _cursor_key) are queried one after the other: the new messages are only
+        sent with the query of the first of them.
+        """
+        inputs = {}
+        observed_keys = set()
+        for player_name in player_names:
+            player, observation, new_messages = self._observe(player_name)
+            cursor_key = self._cursor_key(player)
+            if cursor_key in observed_keys:
+                new_messages = new_messages[:0]
+            observed_keys.add(cursor_key)
+            inputs[player_name] = (player, observation, new_messages)
+        return inputs
+
+    @staticmethod
+    def _can_query_concurrently(players: List[Player]) -> bool:
+        """Whether the backends of the players can be queried at the same time."""
+        # A stateful backend shared by several players holds a single conversation: query it one player at a time
+        backends = [player.backend for player in players if player.backend.stateful]
+        return len({id(backend) for backend in backends}) == len(backends)
+
+    def _step_simultaneous(self, player_names: List[str]) -> TimeStep:
+        """Query the players that act simultaneously in threads, then update the environment with all the actions."""
+        inputs = self._observe_simultaneous(player_names)
+        players = [player for player, _, _ in inputs.values()]
+        if len(players) > 1 and self._can_query_concurrently(players):
+            with ThreadPoolExecutor(max_workers=len(players)) as executor:
+                actions = list(
+                    executor.map(lambda args: self._valid_action(*args), inputs.values())
+                )
+        else:
+            actions = [self._valid_action(*args) for args in inputs.values()]
+        self._accept_observations(player_names)
+        return self.environment.step_simultaneous(dict(zip(player_names, actions)))
+
+    async def _async_step_simultaneous(self, player_names: List[str]) -> TimeStep:
+        """Async version of _step_simultaneous(), which gathers the queries of the players."""
+        inputs = self._observe_simultaneous(player_names)
+        players = [player for player, _, _ in inputs.values()]
+        if self._can_query_concurrently(players):
+            actions = await asyncio.gather(
+                *(self._async_valid_action(*args) for args in inputs.values())
+            )
+        else:
+            actions = [await self._async_valid_action(*args) for args in inputs.values()]
+        self._accept_observations(player_names)
+        return self.environment.step_simultaneous(dict(zip(player_names, actions)))
 
+    def _end_step(self, timestep: TimeStep, num_actions: int = 1) -> TimeStep:
+        """
+        Count the step, emit the step events, and checkpoint the game every checkpoint_interval steps.
+
+        num_steps counts the actions of the players: a simultaneous step counts one step per player, so that
+        max_steps bounds a game the same way whether its players act one at a time or simultaneously.
+        """
+        self.current_timestep = timestep
+        previous_num_steps = self.num_steps
+        self.num_steps += num_actions
+        self.hooks.emit("after_env_step", self, timestep)
+        if timestep.terminal:
+            self.hooks.emit("on_terminal", self, timestep)
+        if (
+            self.checkpoint_path is not None
+            and self.num_steps // self.checkpoint_interval > previous_num_steps // self.checkpoint_interval
+        ):
+            self.checkpoint(self.checkpoint_path)
         return timestep
 
+    def take_action(self, player_name: str, action: str) -> TimeStep:
+        """
+        Update the environment with an action that was not taken by step(), e.g. typed by a human in the CLI.
+
+        The step is counted and emits the step events like the steps of step().
+        """
+        return self._end_step(self.environment.step(player_name, action))
+
+    def step(self) -> TimeStep:
+        """
+        Take a step in the game: one player takes an action and the environment updates.
+
+        In a simultaneous phase of the environment (see Environment.get_simultaneous_players), all the players of
+        the phase are queried concurrently against the same observation, and the environment applies their actions
+        in one transition, which counts one step per player (see num_steps).
+        """
+        simultaneous_players = self._get_simultaneous_players()
+        if simultaneous_players:
+            return self._end_step(
+                self._step_simultaneous(simultaneous_players), len(simultaneous_players)
+            )
+
+        player, observation, new_messages = self._observe()
+        action = self._valid_action(player, observation, new_messages)
+        self._accept_observations([player.name])
+        timestep = self.environment.step(player.name, action)  # update the environment
+        return self._end_step(timestep)
+
+    async def async_step(self) -> TimeStep:
+        """
+        Async version of step().
+
+        The player's backend is queried with async_query, so the event loop can run other games while it waits
+        for the response.
+        """
+        simultaneous_players = self._get_simultaneous_players()
+        if simultaneous_players:
+            return self._end_step(
+                await self._async_step_simultaneous(simultaneous_players), len(simultaneous_players)
+            )
+
+        player, observation, new_messages = self._observe()
+        action = await self._async_valid_action(player, observation, new_messages)
+        self._accept_observations([player.name])
+        return self._end_step(self.environment.step(player.name, action))
+
+    def checkpoint(self, path: str):
+        """
+        Save the state of the game, to resume it after a crash (see resume).
+
+        The checkpoint holds the state of the environment (phase, turn, roles, votes... see Environment.get_state),
+        its message pool, the state of the players (e.g. the Cohere session), the state of the hooks (see
+        ArenaHook.get_state), the cursors of the players, and the state of the random generator of the environment
+        (see Environment.seed).
+
+        The checkpoint file is a log of records. The first checkpoint of a game to a path holds the whole message
+        pool; it is written to a temporary file first, so a crash while writing does not corrupt the previous
+        checkpoint. The next checkpoints to the same path are appended to the file, and only hold the messages
+        appended since the previous one, so checkpointing every step does not rewrite the whole history.
+        A crash while appending leaves a truncated last record, which resume ignores.
+
+        Each record lists the contents of the moderator and system messages that it is the first to hold, its
+        "prompts". The next records refer to a prompt by its ID, its position in the prompts of the log, rather
+        than writing the repeated text again.
+
+        Set checkpoint_path (and checkpoint_interval) to checkpoint the game automatically during the steps.
+
+        Parameters:
+            path (str): The checkpoint file.
+        """
+        pool = getattr(self.environment, "message_pool", None)
+        pool_state = None
+        prompt_ids = {}
+        if pool is not None:
+            start = 0
+            if self._checkpoint_log is not None and self._checkpoint_log[:2] == (path, pool):
+                start = self._checkpoint_log[2]
+                prompt_ids = self._checkpoint_log[4]
+            pool_state = pool.get_state(start)
+            if start and pool_state["offset"] != self._checkpoint_log[3]:
+                pool_state = pool.get_state()  # The pool was reset since the previous checkpoint
+                prompt_ids = {}
+
+        new_prompts = []
+        if pool_state is not None:
+            new_prompts = list(
+                dict.fromkeys(
+                    message.content
+                    for message in pool_state["messages"]
+                    if message.agent_name in (MODERATOR_NAME, SYSTEM_NAME) and message.content not in prompt_ids
+                )
+            )
+
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "uuid": self.uuid,
+            "num_steps": self.num_steps,
+            "observation_cursors": dict(self._observation_cursors),
+            "reward": self.current_timestep.reward,
+            "terminal": self.current_timestep.terminal,
+            "environment": self.environment.get_state(),
+            "message_pool": pool_state,
+            "players": {player.name: player.get_state() for player in self.players},
+            "hooks": self.hooks.get_state(),
+            "random_state": self.environment.rng.getstate(),
+            "prompts": new_prompts,
+        }
+        if pool_state is not None and pool_state["start"] > 0:
+            with open(path, "ab") as f:
+                _CheckpointPickler(f, prompt_ids).dump(state)
+        else:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f)
+            os.replace(tmp_path, path)
+
+        if pool_state is not None:
+            for prompt in new_prompts:
+                prompt_ids[prompt] = len(prompt_ids)
+            self._checkpoint_log = (
+                path,
+                pool,
+                pool_state["start"] + len(pool_state["messages"]),
+                pool_state["offset"],
+                prompt_ids,
+            )
+
+    @staticmethod
+    def read_checkpoint_records(path: str) -> List[Dict]:
+        """
+        Read the records of a checkpoint file (see checkpoint), without a last record truncated by a crash.
+
+        The prompts that a record refers to by their ID are read back as strings.
+        """
+        records = []
+        prompts = []
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    records.append(_CheckpointUnpickler(f, prompts).load())
+                except EOFError:
+                    break
+                except Exception:
+                    if not records:
+                        raise
+                    break  # A record truncated by a crash while appending it
+                prompts.extend(records[-1].get("prompts", []))
+        return records
+
+    @classmethod
+    def _load_checkpoint(cls, path: str) -> Dict:
+        """Read the records of a checkpoint file, and merge their messages into the state of the last one."""
+        records = cls.read_checkpoint_records(path)
+        state = records[-1]
+        if state["version"] != CHECKPOINT_VERSION:
+            raise ValueError(
+                f"Unsupported checkpoint version {state['version']}, expected {CHECKPOINT_VERSION}"
+            )
+        if state["message_pool"] is not None:
+            messages = []
+            for record in records:
+                if record["message_pool"]["start"] != len(messages):
+                    raise ValueError(f"Checkpoint {path} is missing messages")
+                messages.extend(record["message_pool"]["messages"])
+            state["message_pool"] = dict(state["message_pool"], start=0, messages=messages)
+        return state
+
+    def resume(self, path: str) -> TimeStep:
+        """
+        Restore the state of the game from a checkpoint, instead of resetting it.
+
+        The arena must have the same players, environment and hooks as the arena that wrote the checkpoint, e.g. both
+        created by the same factory. The next step continues the game where the checkpoint left it, without
+        querying the players again for the steps already taken.
+        The checkpoint is a pickle: only resume checkpoints you wrote.
+
+        Parameters:
+            path (str): The checkpoint file.
+
+        Returns:
+            TimeStep: The timestep at the time of the checkpoint.
+        """
+        state = self._load_checkpoint(path)
+
+        self.environment.set_state(state["environment"])
+        if state["message_pool"] is not None:
+            self.environment.message_pool.set_state(state["message_pool"])
+        for player_name, player_state in state["players"].items():
+            self.name_to_player[player_name].set_state(player_state)
+        self.hooks.set_state(state["hooks"])
+        self.uuid = state["uuid"]
+        self.num_steps = state["num_steps"]
+        self._observation_cursors = dict(state["observation_cursors"])
+        self._pending_cursors = {}
+        self.environment.rng.setstate(state["random_state"])
+        self._checkpoint_log = None  # The next checkpoint rewrites the file, without a truncated record
+
+        self.current_timestep = TimeStep(
+            observation=self.environment.get_observation(),
+            reward=state["reward"],
+            terminal=state["terminal"],
+        )
+        return self.current_timestep
+
     def next_is_human(self):
         """Check if the next player is human."""
         player_name = self.environment.get_next_player()
@@ -99,6 +496,63 @@ class Arena:
             if timestep.terminal:
                 break
 
+    async def async_run(self, num_steps: int = 1):
+        """Async version of run()."""
+        for i in range(num_steps):
+            timestep = await self.async_step()
+            if timestep.terminal:
+                break
+
+    def _start_episode(self) -> TimeStep:
+        """Reset the game, or resume it if the checkpoint of the arena exists."""
+        if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            return self.resume(self.checkpoint_path)
+        return self.reset()
+
+    def run_episode(
+        self, max_steps: int = None, on_step: Callable[[TimeStep], None] = None
+    ) -> Tuple[TimeStep, Dict]:
+        """
+        Play a game until it ends or reaches `max_steps`, without rendering anything.
+
+        This is the headless counterpart of launch_cli(interactive=False), for batch runs. As in the CLI, a player
+        that makes too many invalid actions ends the game. The game is reset first, or resumed if checkpoint_path
+        exists (see checkpoint).
+
+        Parameters:
+            max_steps (int): Maximum number of steps of the game, i.e. of actions of the players: a simultaneous step
+                that reaches it is played to the end. Defaults to None, which plays until the game ends.
+            on_step (Callable[[TimeStep], None]): If specified, called with the timestep of every step.
+
+        Returns:
+            Tuple[TimeStep, Dict]: The last timestep, and the metrics of the game (see get_metrics).
+        """
+        timestep = self._start_episode()
+        while not timestep.terminal and (max_steps is None or self.num_steps < max_steps):
+            try:
+                timestep = self.step()
+            except TooManyInvalidActions as e:
+                logging.warning(f"Too many invalid actions: {e}")
+                break
+            if on_step is not None:
+                on_step(timestep)
+        return timestep, self.get_metrics()
+
+    async def async_run_episode(
+        self, max_steps: int = None, on_step: Callable[[TimeStep], None] = None
+    ) -> Tuple[TimeStep, Dict]:
+        """Async version of run_episode()."""
+        timestep = self._start_episode()
+        while not timestep.terminal and (max_steps is None or self.num_steps < max_steps):
+            try:
+                timestep = await self.async_step()
+            except TooManyInvalidActions as e:
+                logging.warning(f"Too many invalid actions: {e}")
+                break
+            if on_step is not None:
+                on_step(timestep)
+        return timestep, self.get_metrics()
+
     @classmethod
     def from_config(cls, config: Union[str, ArenaConfig]):
         """Create an arena from a config."""
@@ -211,7 +665,10 @@ class Arena:
     # This function expands on the function right above, save_history. Just like it, 
     # it saves the conversation messages, as well as more information, described 
     # in the README.  
-    def save_chat(self, path: str):
+    # With prompt_ids, the contents of the moderator and system messages are saved once in a "prompts" list, and
+    # their messages have the "prompt_id" of their content in the list instead of a "content" (see
+    # MessageTable.from_chats, which reads both formats).
+    def save_chat(self, path: str, prompt_ids: bool = False):
         if not path.endswith(".json"):
             raise ValueError(
                 "Invalid file format. Please save the chat as a JSON file."
@@ -240,17 +697,26 @@ class Arena:
 
             player_dict["role_desc"] = player.role_desc
 
+            if player.context_policy is not None:
+                player_dict["context"] = player.context_policy.get_metrics(player.name)
+
             player_list.append(player_dict)
 
         chat_dict["players"] = player_list
 
-        metrics = self.environment.get_metrics()
+        metrics = self.get_metrics()
+        context_players = [player for player in player_list if "context" in player]
+        if context_players:
+            metrics["context_tokens_saved"] = sum(
+                player["context"]["context_tokens_saved"] for player in context_players
+            )
 
         chat_dict["metrics"] = metrics
 
         # Messages
         messages = self.environment.get_observation()
         message_rows = []
+        prompts = {}  # Content -> ID of the prompts, with prompt_ids
 
         for message in messages:
             message_row = {
@@ -262,9 +728,67 @@ class Arena:
                 "visible_to": message.visible_to,
                 "msg_type": message.msg_type,
             }
+            if prompt_ids and message.agent_name in (MODERATOR_NAME, SYSTEM_NAME):
+                del message_row["content"]
+                message_row["prompt_id"] = prompts.setdefault(message.content, len(prompts))
             message_rows.append(message_row)
 
+        if prompt_ids:
+            chat_dict["prompts"] = list(prompts)
         chat_dict["messages"] = message_rows
 
         with open(path, "w") as f:
             json.dump(chat_dict, f, indent=4)
+
+
+class ArenaTemplate:
+    """
+    Creates the arenas of many games from one config.
+
+    Arena.from_config parses the config, and the environment reads its prompt config, for every game. A template
+    parses the config once and then only creates the objects that hold the state of a game: the players and their
+    backends, and the environment with its message pool. The configs, the datasets they hold and the parsed
+    prompt configs (see load_prompt_config) are shared by the arenas, and must not be modified.
+
+    A template is picklable, and calling it with a game index creates an arena, so it can be the arena_factory of
+    the experiment runners (see chatarena.experiment).
+    """
+
+    def __init__(self, config: Union[str, ArenaConfig]):
+        """
+        Parameters:
+            config (Union[str, ArenaConfig]): The config of the arenas, or the path of a config file.
+        """
+        if isinstance(config, str):
+            config = ArenaConfig.load(config)
+
+        self.global_prompt = config.get("global_prompt", None)
+
+        self.player_configs = []
+        for player_config in config.players:
+            player_config = dict(player_config)
+            if self.global_prompt is not None:
+                player_config["global_prompt"] = self.global_prompt
+            self.player_configs.append(player_config)
+
+        self.player_names = [player_config["name"] for player_config in self.player_configs]
+        assert len(self.player_names) == len(
+            set(self.player_names)
+        ), "Player names must be unique"
+
+        try:
+            self.env_cls = ENV_REGISTRY[config.environment["env_type"]]
+        except KeyError:
+            raise ValueError(f"Unknown environment type: {config.environment['env_type']}")
+        self.env_config = dict(config.environment)
+        self.env_config.pop("player_names", None)  # Given to every environment by create
+
+    def create(self) -> Arena:
+        """Create the arena of a new game."""
+        players = [Player(**player_config) for player_config in self.player_configs]
+        # Every environment gets its own list of names: some environments reorder it
+        env = self.env_cls(**self.env_config, player_names=list(self.player_names))
+        return Arena(players, env, global_prompt=self.global_prompt)
+
+    def __call__(self, game_idx: int = None) -> Arena:
+        return self.create()
@@ -1,3 +1,4 @@
+import functools
 import os
 import re
 from typing import List
@@ -7,6 +8,7 @@ from tenacity import retry, stop_after_attempt, wait_random_exponential
 from ..message import SYSTEM_NAME as SYSTEM
 from ..message import Message
 from .base import IntelligenceBackend, register_backend
+from .rate_limit import estimate_tokens, get_rate_limiter
 
 try:
     import anthropic
@@ -26,6 +28,12 @@ DEFAULT_MODEL = "claude-v1"
 DEFAULT_TEMPERATURE = 0.0
 
 
+@functools.lru_cache(maxsize=None)
+def _get_client():
+    """The Anthropic client shared by the backends of the process, created on the first call."""
+    return anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+
+
 @register_backend
 class Claude(IntelligenceBackend):
     """Interface to the Claude offered by Anthropic."""
@@ -44,11 +52,14 @@ class Claude(IntelligenceBackend):
 
         self.max_tokens = max_tokens
         self.model = model
-        self.client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+        self.client = _get_client()
         self.role_desc = None
 
     @retry(stop=stop_after_attempt(6), wait=wait_random_exponential(min=1, max=60))
     def _get_response(self, prompt: str):
+        get_rate_limiter("anthropic", self.model).acquire(
+            estimate_tokens(prompt) + self.max_tokens
+        )
         response = self.client.messages.create(
             model=self.model,
             max_tokens=self.max_tokens,
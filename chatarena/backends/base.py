@@ -1,4 +1,6 @@
+import asyncio
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Type
 
 from ..config import BackendConfig, Configurable
@@ -44,7 +46,6 @@ class IntelligenceBackend(Configurable):
     ) -> str:
         raise NotImplementedError
 
-    @abstractmethod
     async def async_query(
         self,
         agent_name: str,
@@ -55,8 +56,88 @@ class IntelligenceBackend(Configurable):
         *args,
         **kwargs,
     ) -> str:
-        """Async querying."""
-        raise NotImplementedError
+        """
+        Async querying.
+
+        By default, the blocking query runs in a worker thread so that it does not block the event loop.
+        Backends with an async client override this method.
+        """
+        return await asyncio.to_thread(
+            self.query,
+            *args,
+            agent_name=agent_name,
+            role_desc=role_desc,
+            history_messages=history_messages,
+            global_prompt=global_prompt,
+            request_msg=request_msg,
+            **kwargs,
+        )
+
+    def query_samples(
+        self,
+        num_samples: int,
+        agent_name: str,
+        role_desc: str,
+        history_messages: List[Message],
+        global_prompt: str = None,
+        request_msg: Message = None,
+        *args,
+        **kwargs,
+    ) -> List[str]:
+        """
+        Sample several responses to the same query.
+
+        By default, a stateless backend sends the queries in parallel threads. A stateful backend would mix the
+        samples into its conversation, so it only returns one response.
+        Backends whose API samples several completions in one request override this method.
+        """
+        kwargs.update(
+            agent_name=agent_name,
+            role_desc=role_desc,
+            history_messages=history_messages,
+            global_prompt=global_prompt,
+            request_msg=request_msg,
+        )
+        if self.stateful or num_samples == 1:
+            return [self.query(*args, **kwargs)]
+        with ThreadPoolExecutor(max_workers=num_samples) as executor:
+            futures = [executor.submit(self.query, *args, **kwargs) for _ in range(num_samples)]
+            return [future.result() for future in futures]
+
+    async def async_query_samples(
+        self,
+        num_samples: int,
+        agent_name: str,
+        role_desc: str,
+        history_messages: List[Message],
+        global_prompt: str = None,
+        request_msg: Message = None,
+        *args,
+        **kwargs,
+    ) -> List[str]:
+        """Async version of query_samples(), which gathers the async queries."""
+        kwargs.update(
+            agent_name=agent_name,
+            role_desc=role_desc,
+            history_messages=history_messages,
+            global_prompt=global_prompt,
+            request_msg=request_msg,
+        )
+        if self.stateful or num_samples == 1:
+            return [await self.async_query(*args, **kwargs)]
+        return list(
+            await asyncio.gather(
+                *(self.async_query(*args, **kwargs) for _ in range(num_samples))
+            )
+        )
+
+    def get_state(self) -> Dict:
+        """The state of a stateful backend (e.g. its session), to checkpoint the game. Empty by default."""
+        return {}
+
+    def set_state(self, state: Dict):
+        """Restore a state returned by get_state."""
+        pass
 
     # reset the state of the backend
     def reset(self):
@@ -1,11 +1,14 @@
-import time
+import asyncio
+import functools
 import os
-from typing import List, Union
+import weakref
+from typing import Dict, List, Union
 
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
-from ..message import Message
+from ..message import Message, find_message
 from .base import IntelligenceBackend, register_backend
+from .rate_limit import estimate_tokens, get_rate_limiter
 
 # Try to import the cohere package and check whether the API key is set
 try:
@@ -18,6 +21,25 @@ else:
     else:
         is_cohere_available = True
 
+# The async clients, one per event loop: an async client can only be used in the loop it was created in
+_async_clients = weakref.WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_client():
+    """The Cohere client shared by the backends of the process, created on the first call."""
+    return cohere.Client(os.environ.get("COHEREAI_API_KEY"))
+
+
+def _get_async_client():
+    """The async Cohere client shared by the backends querying from the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = cohere.AsyncClient(os.environ.get("COHEREAI_API_KEY"))
+    return client
+
+
 # Default config follows the [Cohere documentation](https://cohere-sdk.readthedocs.io/en/latest/cohere.html#cohere.client.Client.chat)
 DEFAULT_TEMPERATURE = 0.4
 DEFAULT_MAX_TOKENS = 1000
@@ -79,7 +101,8 @@ class CohereAIChat(IntelligenceBackend):
         assert (
             is_cohere_available
         ), "Cohere package is not installed or the API key is not set"
-        self.client = cohere.Client(os.environ.get("COHEREAI_API_KEY"))
+        # The clients are shared by all the backends, so that creating the players of a game is cheap
+        self.client = _get_client()
 
         # Stateful variables
         self.session_id = None  # The session id for the last conversation
@@ -91,6 +114,20 @@ class CohereAIChat(IntelligenceBackend):
         self.session_id = None
         self.last_msg_hash = None
 
+    def get_state(self) -> Dict:
+        return {"session_id": self.session_id, "last_msg_hash": self.last_msg_hash}
+
+    def set_state(self, state: Dict):
+        self.session_id = state["session_id"]
+        self.last_msg_hash = state["last_msg_hash"]
+
+    def _estimate_tokens(self, new_message: str, persona_prompt: List[dict]) -> int:
+        """Estimate the tokens of a request, for the rate limiter: the prompt and the longest response."""
+        return (
+            estimate_tokens([self.preamble, new_message, *persona_prompt])
+            + self.max_tokens
+        )
+
     @retry(stop=stop_after_attempt(2), wait=wait_random_exponential(min=1, max=60))
     def _get_response(
         self, new_message: str, persona_prompt: Union[dict], verbose=False
@@ -99,8 +136,9 @@ class CohereAIChat(IntelligenceBackend):
         if verbose:
             print("chat_history:", persona_prompt)
 
-        # sleepy spleepy
-        time.sleep(3)
+        get_rate_limiter("cohere", self.model).acquire(
+            self._estimate_tokens(new_message, persona_prompt)
+        )
         response = self.client.chat(
             new_message,
             chat_history=persona_prompt,
@@ -115,38 +153,46 @@ class CohereAIChat(IntelligenceBackend):
             return "END_OF_CONVERSATION"
         return response.text
 
-    def query(
+    @retry(stop=stop_after_attempt(2), wait=wait_random_exponential(min=1, max=60))
+    async def _async_get_response(self, new_message: str, persona_prompt: Union[dict]):
+        """Async version of _get_response(), with the async Cohere client."""
+        await get_rate_limiter("cohere", self.model).async_acquire(
+            self._estimate_tokens(new_message, persona_prompt)
+        )
+        response = await _get_async_client().chat(
+            new_message,
+            chat_history=persona_prompt,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            conversation_id=self.session_id,
+            preamble=self.preamble,
+        )
+
+        self.session_id = response.conversation_id  # Update the session id
+        if "END_OF_CONVERSATION" in response.text:  # Chat Error
+            return "END_OF_CONVERSATION"
+        return response.text
+
+    def _format_query(
         self,
         agent_name: str,
-        role_desc: str,
         context: str,
         history_messages: List[Message],
-        premable: str = None,
         request_msg: Message = None,
-        *args,
-        **kwargs,
-    ) -> str:
-        """
-        Format the input and call the Cohere API.
-
-        args:
-            agent_name: the name of the agent
-            role_desc: the description of the role of the agent
-            env_desc: the description of the environment
-            history_messages: the history of the conversation, or the observation for the agent
-            request_msg: the request for the CohereAI
-        """
-        # Find the index of the last message of the last conversation
-
-        new_message_start_idx = 0
-        if self.last_msg_hash is not None:
-            for i, message in enumerate(history_messages):
-                if message.msg_hash == self.last_msg_hash:
-                    new_message_start_idx = i + 1
-                    break
-
-        new_messages = history_messages[new_message_start_idx:]
-        assert len(new_messages) > 0, "No new messages found (this should not happen)"
+        new_messages: List[Message] = None,
+    ):
+        """Build the new message and the chat history sent to the Cohere API."""
+        if new_messages is None:
+            # No cursor from the arena (e.g. the terminal check of a moderator): find the index of the last message
+            # of the last conversation, with the hash index of the pool
+            new_message_start_idx = 0
+            if self.last_msg_hash is not None:
+                new_message_start_idx = find_message(history_messages, self.last_msg_hash) + 1
+
+            new_messages = history_messages[new_message_start_idx:]
+            assert len(new_messages) > 0, "No new messages found (this should not happen)"
+        # With a cursor, the new messages are empty for the players of a simultaneous phase that share the backend
+        # with a player queried before them (see Arena._cursor_key): the conversation already holds the messages
 
         new_conversations = []
         for message in new_messages:
@@ -171,9 +217,64 @@ class CohereAIChat(IntelligenceBackend):
             persona_prompt += message.message_dict
         # print("persona_prompt at query:", persona_prompt)
 
+        return new_message, persona_prompt, new_messages
+
+    def query(
+        self,
+        agent_name: str,
+        role_desc: str,
+        context: str,
+        history_messages: List[Message],
+        premable: str = None,
+        request_msg: Message = None,
+        new_messages: List[Message] = None,
+        *args,
+        **kwargs,
+    ) -> str:
+        """
+        Format the input and call the Cohere API.
+
+        args:
+            agent_name: the name of the agent
+            role_desc: the description of the role of the agent
+            env_desc: the description of the environment
+            history_messages: the history of the conversation, or the observation for the agent
+            request_msg: the request for the CohereAI
+            new_messages: the messages of the history that were not sent before, as tracked by the arena's cursor
+        """
+        new_message, persona_prompt, new_messages = self._format_query(
+            agent_name, context, history_messages, request_msg, new_messages
+        )
+
         response = self._get_response(new_message, persona_prompt)
 
         # Only update the last message hash if the API call is successful
-        self.last_msg_hash = new_messages[-1].msg_hash
+        if new_messages:
+            self.last_msg_hash = new_messages[-1].msg_hash
+
+        return response
+
+    async def async_query(
+        self,
+        agent_name: str,
+        role_desc: str,
+        context: str,
+        history_messages: List[Message],
+        premable: str = None,
+        request_msg: Message = None,
+        new_messages: List[Message] = None,
+        *args,
+        **kwargs,
+    ) -> str:
+        """Async version of query(), with the async Cohere client."""
+        new_message, persona_prompt, new_messages = self._format_query(
+            agent_name, context, history_messages, request_msg, new_messages
+        )
+
+        response = await self._async_get_response(new_message, persona_prompt)
+
+        # Only update the last message hash if the API call is successful
+        if new_messages:
+            self.last_msg_hash = new_messages[-1].msg_hash
 
         return response
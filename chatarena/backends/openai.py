@@ -1,13 +1,16 @@
 # TODO
 
+import asyncio
 import os
 import re
+import weakref
 from typing import List
 
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
 from ..message import SYSTEM_NAME, Message
 from .base import IntelligenceBackend, register_backend
+from .rate_limit import estimate_tokens, get_rate_limiter
 
 try:
     import openai
@@ -22,6 +25,21 @@ else:
         # logging.warning("OpenAI API key is not set. Please set the environment variable OPENAI_API_KEY")
         is_openai_available = False
 
+# The async clients, one per event loop: an async client can only be used in the loop it was created in
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _get_async_client():
+    """The async OpenAI client shared by the backends querying from the running event loop."""
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        async_client = _async_clients[loop] = openai.AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY")
+        )
+    return async_client
+
+
 # Default config follows the OpenAI playground
 DEFAULT_TEMPERATURE = 0.7
 DEFAULT_MAX_TOKENS = 256
@@ -73,39 +91,51 @@ class OpenAIChat(IntelligenceBackend):
         self.model = model
         self.merge_other_agent_as_user = merge_other_agents_as_one_user
 
+    def _estimate_tokens(self, messages: List[dict], n: int = 1) -> int:
+        """Estimate the tokens of a request, for the rate limiter: the prompt and n responses of max_tokens tokens."""
+        return estimate_tokens(messages) + n * self.max_tokens
+
     @retry(stop=stop_after_attempt(6), wait=wait_random_exponential(min=1, max=60))
-    def _get_response(self, messages):
+    def _get_responses(self, messages, n: int = 1) -> List[str]:
+        """Sample n completions in one request."""
+        get_rate_limiter("openai", self.model).acquire(self._estimate_tokens(messages, n))
         completion = client.chat.completions.create(
             model=self.model,
             messages=messages,
-            temperature=self.temperature
+            temperature=self.temperature,
+            n=n,
         )
 
-        response = completion.choices[0].message.content
-        response = response.strip()
-        return response
+        return [choice.message.content.strip() for choice in completion.choices]
 
-    def query(
+    def _get_response(self, messages):
+        return self._get_responses(messages)[0]
+
+    @retry(stop=stop_after_attempt(6), wait=wait_random_exponential(min=1, max=60))
+    async def _async_get_responses(self, messages, n: int = 1) -> List[str]:
+        """Async version of _get_responses()."""
+        await get_rate_limiter("openai", self.model).async_acquire(self._estimate_tokens(messages, n))
+        completion = await _get_async_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            n=n,
+        )
+
+        return [choice.message.content.strip() for choice in completion.choices]
+
+    async def _async_get_response(self, messages):
+        return (await self._async_get_responses(messages))[0]
+
+    def _format_messages(
         self,
         agent_name: str,
         role_desc: str,
         history_messages: List[Message],
         global_prompt: str = None,
         request_msg: Message = None,
-        *args,
-        **kwargs,
-    ) -> str:
-        """
-        Format the input and call the ChatGPT/GPT-4 API.
-
-        args:
-            agent_name: the name of the agent
-            role_desc: the description of the role of the agent
-            env_desc: the description of the environment
-            history_messages: the history of the conversation, or the observation for the agent
-            request_msg: the request from the system to guide the agent's next response
-        """
-
+    ) -> List[dict]:
+        """Build the messages sent to the ChatGPT/GPT-4 API."""
         # Merge the role description and the global prompt as the system prompt for the agent
         if global_prompt:  # Prepend the global prompt if it exists
             system_prompt = f"You are a helpful assistant.\n{global_prompt.strip()}\n\nYour name is {agent_name}.\n\nYour role:{role_desc}"
@@ -158,8 +188,10 @@ class OpenAIChat(IntelligenceBackend):
                     else:
                         raise ValueError(f"Invalid role: {messages[-1]['role']}")
 
-        response = self._get_response(messages)
+        return messages
 
+    def _clean_response(self, agent_name: str, response: str) -> str:
+        """Remove the agent name and the end of message token from a response."""
         # Remove the agent name if the response starts with it
         response = re.sub(rf"^\s*\[.*]:", "", response).strip()  # noqa: F541
         response = re.sub(
@@ -170,3 +202,82 @@ class OpenAIChat(IntelligenceBackend):
         response = re.sub(rf"{END_OF_MESSAGE}$", "", response).strip()
 
         return response
+
+    def query(
+        self,
+        agent_name: str,
+        role_desc: str,
+        history_messages: List[Message],
+        global_prompt: str = None,
+        request_msg: Message = None,
+        *args,
+        **kwargs,
+    ) -> str:
+        """
+        Format the input and call the ChatGPT/GPT-4 API.
+
+        args:
+            agent_name: the name of the agent
+            role_desc: the description of the role of the agent
+            env_desc: the description of the environment
+            history_messages: the history of the conversation, or the observation for the agent
+            request_msg: the request from the system to guide the agent's next response
+        """
+        messages = self._format_messages(
+            agent_name, role_desc, history_messages, global_prompt, request_msg
+        )
+        response = self._get_response(messages)
+        return self._clean_response(agent_name, response)
+
+    async def async_query(
+        self,
+        agent_name: str,
+        role_desc: str,
+        history_messages: List[Message],
+        global_prompt: str = None,
+        request_msg: Message = None,
+        *args,
+        **kwargs,
+    ) -> str:
+        """Async version of query(), with the async OpenAI client."""
+        messages = self._format_messages(
+            agent_name, role_desc, history_messages, global_prompt, request_msg
+        )
+        response = await self._async_get_response(messages)
+        return self._clean_response(agent_name, response)
+
+    def query_samples(
+        self,
+        num_samples: int,
+        agent_name: str,
+        role_desc: str,
+        history_messages: List[Message],
+        global_prompt: str = None,
+        request_msg: Message = None,
+        *args,
+        **kwargs,
+    ) -> List[str]:
+        """Sample several responses in a single request, with the `n` parameter of the API."""
+        messages = self._format_messages(
+            agent_name, role_desc, history_messages, global_prompt, request_msg
+        )
+        responses = self._get_responses(messages, n=num_samples)
+        return [self._clean_response(agent_name, response) for response in responses]
+
+    async def async_query_samples(
+        self,
+        num_samples: int,
+        agent_name: str,
+        role_desc: str,
+        history_messages: List[Message],
+        global_prompt: str = None,
+        request_msg: Message = None,
+        *args,
+        **kwargs,
+    ) -> List[str]:
+        """Async version of query_samples(), with the async OpenAI client."""
+        messages = self._format_messages(
+            agent_name, role_desc, history_messages, global_prompt, request_msg
+        )
+        responses = await self._async_get_responses(messages, n=num_samples)
+        return [self._clean_response(agent_name, response) for response in responses]
@@ -0,0 +1,162 @@
+"""
+Rate limits of the backend APIs.
+
+The backends of a process share one RateLimiter per provider and model, which holds a token bucket of requests per
+minute and a token bucket of tokens per minute. Before a request, a backend reserves one request and an estimate of
+its tokens: the request goes out at once while the quota allows it, and otherwise waits until the buckets have
+refilled. The concurrent games of a process (threads or asyncio tasks) thus share one budget, instead of each
+waiting for a fixed time before every request.
+
+The limits are per process: when the games are split between processes (see run_sharded_experiments), divide the
+limits of the provider by the number of processes with set_rate_limit.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Iterable, Tuple, Union
+
+# Default limits per provider: (requests per minute, tokens per minute), None for no limit.
+# They follow the lowest tiers of the providers (e.g. the trial keys of Cohere), and can be raised with set_rate_limit.
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[int, int]] = {
+    "cohere": (20, None),
+    "openai": (500, 200_000),
+    "anthropic": (50, 40_000),
+}
+
+CHARS_PER_TOKEN = 4  # Rough number of characters per token, to estimate the tokens of a request before sending it
+
+
+def estimate_tokens(texts: Union[str, Iterable]) -> int:
+    """
+    Estimate the number of tokens of a request from the number of characters of its texts.
+
+    Parameters:
+        texts (Union[str, Iterable]): A text, or the texts of the request: strings, or dictionaries whose string values
+            are texts (e.g. the messages of a chat API).
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    if isinstance(texts, str):
+        return len(texts) // CHARS_PER_TOKEN + 1
+    num_chars = 0
+    for text in texts:
+        if isinstance(text, dict):
+            num_chars += sum(len(value) for value in text.values() if isinstance(value, str))
+        elif isinstance(text, str):
+            num_chars += len(text)
+    return num_chars // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """
+    A bucket of `capacity` units that refills at `capacity` units per `period` seconds.
+
+    A reservation takes its units from the bucket at once, even if the bucket does not hold them yet: the bucket goes
+    in debt, and the reservation waits until the debt is refilled. So the reservations are served in order, and a
+    reservation larger than the capacity does not wait forever.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period  # Units per second
+        self._level = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` units from the bucket. Returns the number of seconds to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._level = min(self.capacity, self._level + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._level -= amount
+            return max(0.0, -self._level / self.rate)
+
+
+class RateLimiter:
+    """The request and token buckets of a provider and model."""
+
+    def __init__(self, requests_per_minute: int = None, tokens_per_minute: int = None):
+        """
+        Parameters:
+            requests_per_minute (int): The maximum number of requests per minute, None for no limit.
+            tokens_per_minute (int): The maximum number of tokens per minute, None for no limit.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def _reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self._requests is not None:
+            wait = self._requests.reserve(1)
+        if self._tokens is not None and tokens:
+            wait = max(wait, self._tokens.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens: int = 0):
+        """
+        Wait until a request of `tokens` tokens fits in the quota.
+
+        Parameters:
+            tokens (int): The estimated number of tokens of the request (prompt and completion).
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def async_acquire(self, tokens: int = 0):
+        """Async version of acquire(), which does not block the event loop."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_rate_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_rate_limits: Dict[Tuple[str, str], Tuple[int, int]] = {}  # Limits set with set_rate_limit
+_lock = threading.Lock()
+
+
+def set_rate_limit(
+    provider: str, model: str = None, requests_per_minute: int = None, tokens_per_minute: int = None
+):
+    """
+    Set the limits of a provider, or of one of its models.
+
+    The backends get their rate limiter before each request, so the new limits apply to the next requests.
+
+    Parameters:
+        provider (str): The provider, e.g. "cohere", "openai" or "anthropic".
+        model (str): The model. Defaults to None, which sets the limits of all the models of the provider.
+        requests_per_minute (int): The maximum number of requests per minute, None for no limit.
+        tokens_per_minute (int): The maximum number of tokens per minute, None for no limit.
+    """
+    with _lock:
+        _rate_limits[(provider, model)] = (requests_per_minute, tokens_per_minute)
+        for key in list(_rate_limiters):
+            if key[0] == provider and (model is None or key[1] == model):
+                del _rate_limiters[key]
+
+
+def get_rate_limiter(provider: str, model: str) -> RateLimiter:
+    """
+    The rate limiter shared by the backends of a provider and model in this process.
+
+    Parameters:
+        provider (str): The provider, e.g. "cohere", "openai" or "anthropic".
+        model (str): The model.
+
+    Returns:
+        RateLimiter: The rate limiter, created with the limits of the model, or else of the provider.
+    """
+    with _lock:
+        rate_limiter = _rate_limiters.get((provider, model))
+        if rate_limiter is None:
+            limits = _rate_limits.get(
+                (provider, model),
+                _rate_limits.get((provider, None), DEFAULT_RATE_LIMITS.get(provider, (None, None))),
+            )
+            rate_limiter = _rate_limiters[(provider, model)] = RateLimiter(*limits)
+        return rate_limiter
@@ -0,0 +1,184 @@
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Union
+
+from .backends import IntelligenceBackend, load_backend
+from .config import BackendConfig, Configurable
+from .message import MODERATOR_NAME, SYSTEM_NAME, Message, find_message
+
+# Name under which the dropped messages are sent to the summary backend
+SUMMARIZER_NAME = "Summarizer"
+DEFAULT_SUMMARY_PROMPT = (
+    "Summarize the conversation above in a few sentences. "
+    "Keep every fact that matters to keep playing the game: who said what, the clues, the accusations and the votes."
+)
+# Rough number of characters per token, used to estimate the size of the prompts
+CHARS_PER_TOKEN = 4
+METRIC_NAMES = (
+    "context_queries",
+    "context_tokens_sent",
+    "context_tokens_saved",
+    "summary_tokens",
+)
+
+
+def estimate_tokens(messages: Sequence[Message]) -> int:
+    """Estimate the number of prompt tokens of a list of messages (about four characters per token)."""
+    return sum(len(message.content) for message in messages) // CHARS_PER_TOKEN
+
+
+class ContextPolicy(Configurable):
+    """
+    A policy that bounds the context sent to the backend of a player.
+
+    The policy is applied to the observation of the player before the backend is queried (see Player.act).
+    It keeps the messages of the last `max_turns` turns and, optionally, every earlier moderator and system message
+    (the rules, the words and the phase announcements). The other messages are dropped, or replaced by a rolling
+    summary written by `summary_backend`, usually a cheaper model.
+
+    The policy keeps its state per player name, so one policy can be shared by several players. It counts the
+    estimated number of prompt tokens it saved, which Arena.save_chat reports with the metrics of the game.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = None,
+        keep_moderator: bool = True,
+        summary_backend: Union[BackendConfig, IntelligenceBackend] = None,
+        summary_prompt: str = DEFAULT_SUMMARY_PROMPT,
+        **kwargs,
+    ):
+        """
+        Parameters:
+            max_turns (int): Number of most recent turns kept in the context. Defaults to None, which keeps everything.
+            keep_moderator (bool): Whether to keep the moderator and system messages older than the last turns.
+            summary_backend (Union[BackendConfig, IntelligenceBackend]): If specified, the dropped messages are replaced
+                by a summary written by this backend.
+            summary_prompt (str): The request sent to the summary backend.
+        """
+        if isinstance(summary_backend, BackendConfig):
+            summary_backend = load_backend(summary_backend)
+        super().__init__(
+            max_turns=max_turns,
+            keep_moderator=keep_moderator,
+            summary_backend=summary_backend.to_config() if summary_backend else None,
+            summary_prompt=summary_prompt,
+            **kwargs,
+        )
+        self.max_turns = max_turns
+        self.keep_moderator = keep_moderator
+        self.summary_backend = summary_backend
+        self.summary_prompt = summary_prompt
+        self.reset()
+
+    def reset(self):
+        """Forget the summaries and the token counts, at the end of a game."""
+        self._summaries: Dict[str, tuple] = {}  # Player name -> (summary, hash of the last summarized message)
+        self._metrics: Dict[str, Dict[str, int]] = {}  # Player name -> token counts
+
+    def get_state(self) -> Dict:
+        """The summaries and token counts, to checkpoint the game."""
+        return {"summaries": dict(self._summaries), "metrics": dict(self._metrics)}
+
+    def set_state(self, state: Dict):
+        """Restore a state returned by get_state."""
+        self._summaries = dict(state["summaries"])
+        self._metrics = dict(state["metrics"])
+
+    def get_metrics(self, agent_name: str = None) -> Dict[str, int]:
+        """
+        Get the token counts of a player, or of all the players.
+
+        Returns:
+            Dict[str, int]: The number of queries, the estimated tokens sent and saved, and the estimated
+                tokens sent to the summary backend.
+        """
+        totals = dict.fromkeys(METRIC_NAMES, 0)
+        for name, metrics in self._metrics.items():
+            if agent_name is None or name == agent_name:
+                for key, value in metrics.items():
+                    totals[key] += value
+        return totals
+
+    def apply(self, agent_name: str, observation: Sequence[Message]) -> Sequence[Message]:
+        """
+        Bound the observation of a player.
+
+        Parameters:
+            agent_name (str): The name of the player.
+            observation (Sequence[Message]): The messages observed by the player, in order.
+
+        Returns:
+            Sequence[Message]: The messages to send to the backend.
+        """
+        if self.max_turns is None or len(observation) == 0:
+            return observation
+
+        # The observation is ordered by turn: find the first message of the last turns
+        first_turn = observation[-1].turn - self.max_turns + 1
+        start = bisect_left(observation, first_turn, key=lambda message: message.turn)
+
+        context, dropped = [], []
+        for message in observation[:start]:
+            if self.keep_moderator and message.agent_name in (MODERATOR_NAME, SYSTEM_NAME):
+                context.append(message)
+            else:
+                dropped.append(message)
+
+        metrics = self._metrics.setdefault(agent_name, dict.fromkeys(METRIC_NAMES, 0))
+        metrics["context_queries"] += 1
+        if not dropped:
+            metrics["context_tokens_sent"] += estimate_tokens(observation)
+            return observation
+
+        if self.summary_backend is not None:
+            summary = self._summarize(agent_name, dropped, metrics)
+            context.append(
+                Message(
+                    agent_name=SYSTEM_NAME,
+                    content=f"Summary of the earlier conversation: {summary}",
+                    turn=first_turn,
+                    visible_to=agent_name,
+                )
+            )
+        context.extend(observation[start:])
+
+        metrics["context_tokens_sent"] += estimate_tokens(context)
+        metrics["context_tokens_saved"] += estimate_tokens(observation) - estimate_tokens(context)
+        return context
+
+    def _summarize(self, agent_name: str, dropped: List[Message], metrics: Dict[str, int]) -> str:
+        """Fold the newly dropped messages into the rolling summary of a player."""
+        summary, last_summarized = self._summaries.get(agent_name, (None, None))
+        # The boundary is the last summarized message rather than a count: the observation does not always start at
+        # the same message (e.g. after a new epoch of the message pool, see MessagePool.new_epoch). The dropped
+        # messages after it are new; if the observation no longer holds it, they all are.
+        num_summarized = 0
+        if last_summarized is not None:
+            num_summarized = find_message(dropped, last_summarized) + 1
+        if num_summarized == len(dropped):
+            return summary
+
+        history = []
+        if summary is not None:
+            history.append(
+                Message(
+                    agent_name=SYSTEM_NAME,
+                    content=f"Summary of the earlier conversation: {summary}",
+                    turn=-1,
+                )
+            )
+        history.extend(dropped[num_summarized:])
+
+        # Stateful backends would mix the summaries with their previous conversation
+        if self.summary_backend.stateful:
+            self.summary_backend.reset()
+        summary = self.summary_backend.query(
+            agent_name=SUMMARIZER_NAME,
+            role_desc=self.summary_prompt,
+            history_messages=history,
+            request_msg=Message(agent_name=SYSTEM_NAME, content=self.summary_prompt, turn=-1),
+            context=[],
+        )
+        metrics["summary_tokens"] += estimate_tokens(history)
+        self._summaries[agent_name] = (summary, dropped[-1].msg_hash)
+        return summary
@@ -3,6 +3,7 @@ Datastore module for chat_arena.
 
 This module provides utilities for storing the messages and the game results into database.
 Currently, it supports Supabase.
+To log the games of an arena as they are played, add a DatabaseLogger hook to it (see chatarena.hooks).
 """
 import json
 import os
@@ -10,6 +11,7 @@ import uuid
 from typing import List
 
 from .arena import Arena
+from .hooks import ArenaHook
 from .message import Message
 
 # Attempt importing Supabase
@@ -32,6 +34,7 @@ class SupabaseDB:
         assert supabase_available and SUPABASE_URL and SUPABASE_SECRET_KEY
         supabase_client = supabase.create_client(SUPABASE_URL, SUPABASE_SECRET_KEY)
         self.client = supabase_client
+        self._cursors = {}  # Arena id -> cursor of the messages already saved
 
     # Save Arena state to Supabase
     def save_arena(self, arena: Arena):
@@ -94,7 +97,10 @@ class SupabaseDB:
     # Save the messages
     def save_messages(self, arena: Arena, messages: List[Message] = None):
         if messages is None:
-            messages = arena.environment.get_observation()
+            # Only read the messages added since the last save of this arena
+            messages, self._cursors[arena.uuid] = arena.environment.get_new_messages(
+                cursor=self._cursors.get(arena.uuid, 0)
+            )
 
         # Filter messages that are already logged
         messages = [msg for msg in messages if not msg.logged]
@@ -134,3 +140,24 @@ def log_messages(arena: Arena, messages: List[Message], database=None):
         pass
     else:
         database.save_messages(arena, messages)
+
+
+class DatabaseLogger(ArenaHook):
+    """
+    A hook that logs the games of an arena into the database as they are played.
+
+    The arena (environment and player configs) is saved at its first step, then the new messages after each step.
+    """
+
+    def __init__(self, database=None):
+        if database is None:
+            database = SupabaseDB()
+        self.database = database
+        self._saved_arenas = set()  # Ids of the games already saved
+
+    def after_env_step(self, arena: Arena, timestep):
+        if arena.uuid in self._saved_arenas:
+            self.database.save_messages(arena)
+        else:
+            self.database.save_arena(arena)
+            self._saved_arenas.add(arena.uuid)
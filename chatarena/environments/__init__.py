@@ -1,8 +1,9 @@
 from ..config import EnvironmentConfig
 from .base import ENV_REGISTRY, Environment, TimeStep, register_env
 from .conversation import Conversation, ModeratedConversation
-from .askguess import AskGuess  # , Taboo
+from .askguess import AskGuess
 from .spyfall import SpyFall
+from .taboo import Taboo
 
 
 # Load an environment from a config dictionary
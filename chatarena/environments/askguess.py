@@ -10,22 +10,24 @@
 # switches the step logic depending on each phase. Other functions simply support
 # the main game logic. 
 
-import random
 import string
 from unidecode import unidecode
 import re
-from typing import Dict, List, Union
-import yaml
+from typing import Dict, List, Tuple, Union
 
 from ..agent import SIGNAL_END_OF_CONVERSATION
 from ..message import Message, MessagePool
 from .base import Environment, TimeStep, register_env
-from ..utils import extract_jsons
+from ..utils import check_response_format, extract_jsons, load_prompt_config
 
 
 # Super hard word
 DEFAULT_WORD_LIST = ["Ornithorhynchus"]
 
+# How many words does the sentence format allow. By default 2, as none of our secret words are longer than 2.
+MAX_NB_WORDS = 2
+
+
 @register_env
 class AskGuess(Environment):
     type_name = "ask-guess"
@@ -36,6 +38,7 @@ class AskGuess(Environment):
         prompt_config_file: str,
         player_names: List[str],
         word_list: List[str] = None,
+        retry_format_errors: bool = False,
         **kwargs,
     ):
         super().__init__(player_names=player_names, word_list=word_list, **kwargs)
@@ -63,11 +66,12 @@ class AskGuess(Environment):
         self._is_terminal = False
 
         self._prompt_config_mode = prompt_config_mode
+        # Whether the responses in the wrong format are rejected by check_action instead of ending the game
+        self.retry_format_errors = retry_format_errors
         self._prompt_config_prompt_config_file = prompt_config_file
 
         # Reading prompt configs
-        with open(self._prompt_config_prompt_config_file, "r") as file:
-            self._prompts = yaml.safe_load(file)
+        self._prompts = load_prompt_config(self._prompt_config_prompt_config_file)
 
 
         self.reset()  # To initialize the game (select a random word and roles)
@@ -81,9 +85,9 @@ class AskGuess(Environment):
 
     def reset(self):
         """Sample a random word and roles."""
-        self.word = random.choice(self.word_list)
+        self.word = self.rng.choice(self.word_list)
 
-        self.guesser = random.choice(self.player_names)
+        self.guesser = self.rng.choice(self.player_names)
         self.speaker = [name for name in self.player_names if name != self.guesser][0]
 
         self._current_turn = 0
@@ -134,6 +138,17 @@ class AskGuess(Environment):
                 player_name, turn=self._current_turn
             )
 
+    def get_new_messages(
+        self, player_name=None, cursor: int = 0
+    ) -> Tuple[List[Message], int]:
+        """Get the messages added to the observation of the player since the cursor."""
+        if player_name is None:
+            return self.message_pool.get_new_messages(cursor=cursor)
+        else:
+            return self.message_pool.get_new_messages(
+                player_name, cursor, turn=self._current_turn
+            )
+
     def _text2guess(self, text) -> str:
         """Convert text to word guess, return the word guess."""
         text = text.lower()
@@ -226,6 +241,36 @@ class AskGuess(Environment):
 
         return metrics
 
+    def end_game(self, end_condition: str):
+        self._ending_condition = end_condition
+        self._is_terminal = True
+
+    def get_state(self) -> Dict:
+        """The game state, to checkpoint the game (see Environment.get_state)."""
+        return {
+            "word": self.word,
+            "guesser": self.guesser,
+            "speaker": self.speaker,
+            "_current_turn": self._current_turn,
+            "_current_phase": self._current_phase,
+            "_initialized": self._initialized,
+            "_correct_guess": self._correct_guess,
+            "_ending_condition": self._ending_condition,
+            "_is_terminal": self._is_terminal,
+        }
+
+    def check_format(self, action: str, player_name: str) -> bool:
+        """The guesses are parsed from the format of the prompt mode, the JSON responses in every phase."""
+        if (self._prompt_config_mode=="bracket_format") | (self._prompt_config_mode=="best") | (self._prompt_config_mode=="final_baseline"):
+            response_format = "bracket"
+        elif self._prompt_config_mode=="sentence_format":
+            response_format = "sentence"
+        else:
+            response_format = "json"
+        if response_format != "json" and self._current_phase != "guess":
+            return True
+        return check_response_format(action, response_format, MAX_NB_WORDS)
+
     def step(self, player_name: str, action: str) -> TimeStep:
         """
         Step function that is called by the arena.
@@ -440,7 +485,6 @@ class AskGuess(Environment):
             return guess, arguments, timestep
         
     def get_sentence_response(self, action):
-        MAX_NB_WORDS = 2 # How many words does the format allow. By default 2, as none of our secret words are longer than 2. 
         if self._current_phase == "give clues":
             if "END_OF_CONVERSATION" in action:
                 self._ending_condition = "CE"
@@ -1,18 +1,21 @@
+import random
 from abc import abstractmethod
 from dataclasses import dataclass
-from typing import Dict, List, Type
+from typing import Dict, List, Tuple, Type
 
 from ..config import Configurable, EnvironmentConfig
 from ..message import Message
 from ..utils import AttributedDict
 
 
-@dataclass
+@dataclass(init=False)
 class TimeStep(AttributedDict):
     """
     Represents a single step in time within the simulation.
 
-    It includes observation, reward, and terminal state.
+    It includes observation, reward, and terminal state. The fields are built when the step is taken: the
+    observation is a view of the message pool with a fixed length, so it does not copy the history and later
+    messages do not show up in it.
 
     Attributes:
         observation (List[Message]): A list of messages (observations) for the current timestep.
@@ -24,6 +27,10 @@ class TimeStep(AttributedDict):
     reward: Dict[str, float]
     terminal: bool
 
+    def __init__(self, observation, reward, terminal: bool):
+        # Fill the dictionary directly: a timestep is created at every step
+        dict.__init__(self, observation=observation, reward=reward, terminal=terminal)
+
 
 class Environment(Configurable):
     """
@@ -42,6 +49,7 @@ class Environment(Configurable):
     """
 
     type_name = None
+    retry_format_errors = False  # Whether check_action rejects the actions in the wrong format
 
     @abstractmethod
     def __init__(self, player_names: List[str], **kwargs):
@@ -55,6 +63,8 @@ class Environment(Configurable):
             player_names=player_names, **kwargs
         )  # registers the arguments with Configurable
         self.player_names = player_names
+        # The random generator of the games: the global one, until the environment is seeded (see seed)
+        self.rng = random
 
     def __init_subclass__(cls, **kwargs):
         """
@@ -78,6 +88,19 @@ class Environment(Configurable):
         """
         pass
 
+    def seed(self, seed: int = None):
+        """
+        Give the environment its own random generator, from which it samples its games (e.g. the roles and the words).
+
+        By default, an environment samples from the global random generator. An environment with its own generator
+        is not affected by the other games of the process (e.g. the games that an experiment runs concurrently, see
+        chatarena.experiment), and its checkpoints hold the state of its own generator (see Arena.checkpoint).
+
+        Parameters:
+            seed (int): The seed of the generator. Defaults to None, which seeds it from the system.
+        """
+        self.rng = random.Random(seed)
+
     def to_config(self) -> EnvironmentConfig:
         self._config_dict["env_type"] = self.type_name
         return EnvironmentConfig(**self._config_dict)
@@ -116,6 +139,26 @@ class Environment(Configurable):
         """
         pass
 
+    def get_new_messages(
+        self, player_name=None, cursor: int = 0
+    ) -> Tuple[List[Message], int]:
+        """
+        Return the messages added to the observation of a given player since a cursor.
+
+        The cursor is opaque: start from 0 and pass back the cursor returned by the previous call.
+        The default implementation slices get_observation(); environments backed by a MessagePool
+        override it so that the cost only depends on the number of new messages.
+
+        Parameters:
+            player_name (str, optional): The name of the player for whom to get the new messages.
+            cursor (int): The cursor returned by the previous call, or 0 to read from the beginning.
+
+        Returns:
+            Tuple[List[Message], int]: The new messages, and the cursor to pass to the next call.
+        """
+        observation = self.get_observation(player_name)
+        return observation[cursor:], len(observation)
+
     @abstractmethod
     def print(self):
         """Print the environment state."""
@@ -138,13 +181,46 @@ class Environment(Configurable):
         """
         pass
 
+    def get_simultaneous_players(self) -> List[str]:
+        """
+        Return the players that act simultaneously in the next step, e.g. the voters of a voting phase.
+
+        The arena queries all of them against the same state of the environment, then applies their actions with
+        step_simultaneous. The default implementation returns an empty list: the next step is get_next_player's.
+
+        Returns:
+            List[str]: The names of the players, in the order their actions are applied.
+        """
+        return []
+
+    def step_simultaneous(self, actions: Dict[str, str]) -> TimeStep:
+        """
+        Execute a step in the environment given the actions of the players returned by get_simultaneous_players.
+
+        The default implementation applies the actions one at a time with step(), in the order of the dictionary,
+        and stops at the first terminal timestep.
+
+        Parameters:
+            actions (Dict[str, str]): Player name -> action.
+
+        Returns:
+            TimeStep: The timestep after the last action.
+        """
+        timestep = None
+        for player_name, action in actions.items():
+            timestep = self.step(player_name, action)
+            if timestep.terminal:
+                break
+        return timestep
+
     @abstractmethod
     def check_action(self, action: str, player_name: str) -> bool:
         """
         Check whether a given action is valid for a player.
 
-        Note:
-            This method must be implemented by subclasses.
+        With `retry_format_errors`, the default implementation rejects the actions that check_format rejects, so that
+        the arena queries the player again instead of the game ending with a format error. An action that ends the
+        conversation is always valid.
 
         Parameters:
             action (str): The action to be checked.
@@ -153,6 +229,24 @@ class Environment(Configurable):
         Returns:
             bool: True if the action is valid, False otherwise.
         """
+        if not self.retry_format_errors or "END_OF_CONVERSATION" in action:
+            return True
+        return self.check_format(action, player_name)
+
+    def check_format(self, action: str, player_name: str) -> bool:
+        """
+        Check whether step() can parse the action of a player (see check_action).
+
+        Environments whose step() ends the game on responses in the wrong format override it, e.g. with
+        utils.check_response_format. The default implementation accepts every action.
+
+        Parameters:
+            action (str): The action to be checked.
+            player_name (str): The name of the player.
+
+        Returns:
+            bool: True if the action is in the right format, False otherwise.
+        """
         return True
 
     @abstractmethod
@@ -194,6 +288,45 @@ class Environment(Configurable):
         """
         pass
 
+    def end_game(self, end_condition: str):
+        """
+        End the game from outside of the environment, e.g. when the players of the arena are stuck in a loop.
+
+        Environments that report an end_condition in get_metrics override it to end the game with the given end
+        condition. The default implementation does nothing: the caller marks its timestep as terminal.
+
+        Parameters:
+            end_condition (str): The end condition reported by get_metrics.
+        """
+        pass
+
+    def get_state(self) -> Dict:
+        """
+        Return the state of the environment, to checkpoint the game (see Arena.checkpoint).
+
+        The state only holds what changes during a game (the phase, the turn, the roles, the votes...), not what the
+        environment was created with (its config, its prompts, its clients). The message pool and the random
+        generator are not part of it either: the arena saves them separately (see MessagePool.get_state).
+        Environments override it with their game state. The default implementation returns all the attributes of the
+        environment except the message pool and the random generator, which must then be picklable.
+
+        Returns:
+            Dict: The state, which set_state restores.
+        """
+        state = dict(vars(self))
+        state.pop("message_pool", None)
+        state.pop("rng", None)
+        return state
+
+    def set_state(self, state: Dict):
+        """
+        Restore a state returned by get_state.
+
+        Parameters:
+            state (Dict): The state of the environment.
+        """
+        vars(self).update(state)
+
     def get_zero_rewards(self) -> Dict[str, float]:
         """
         Return a dictionary with all player names as keys and zero as reward.
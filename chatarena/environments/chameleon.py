@@ -1,6 +1,5 @@
-import random
 import re
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 
 from ..agent import SIGNAL_END_OF_CONVERSATION
 from ..message import Message, MessagePool
@@ -93,9 +92,9 @@ class Chameleon(Environment):
 
     def reset(self):
         """Sample topic, code and chameleon code."""
-        self.topic = random.choice(list(self.topic_codes.keys()))
-        self.code = random.choice(self.topic_codes[self.topic])
-        self.chameleon_name = random.choice(self.player_names)
+        self.topic = self.rng.choice(list(self.topic_codes.keys()))
+        self.code = self.rng.choice(self.topic_codes[self.topic])
+        self.chameleon_name = self.rng.choice(self.player_names)
         self.non_chameleon_names = [
             name for name in self.player_names if name != self.chameleon_name
         ]
@@ -141,6 +140,17 @@ class Chameleon(Environment):
                 player_name, turn=self._current_turn
             )
 
+    def get_new_messages(
+        self, player_name=None, cursor: int = 0
+    ) -> Tuple[List[Message], int]:
+        """Get the messages added to the observation of the player since the cursor."""
+        if player_name is None:
+            return self.message_pool.get_new_messages(cursor=cursor)
+        else:
+            return self.message_pool.get_new_messages(
+                player_name, cursor, turn=self._current_turn
+            )
+
     def _text2vote(self, text) -> str:
         """Convert text to vote, return a player's name."""
         # lower = text.lower().replace("[", "").replace("]", "").replace(".", "")
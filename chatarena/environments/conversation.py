@@ -1,4 +1,5 @@
-from typing import List, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Tuple, Union
 
 from ..agent import SIGNAL_END_OF_CONVERSATION, Moderator
 from ..config import AgentConfig, EnvironmentConfig
@@ -16,13 +17,31 @@ class Conversation(Environment):
 
     type_name = "conversation"
 
-    def __init__(self, player_names: List[str], parallel: bool = False, **kwargs):
-        super().__init__(player_names=player_names, parallel=parallel, **kwargs)
+    def __init__(
+        self,
+        player_names: List[str],
+        parallel: bool = False,
+        spill_dir: str = None,
+        **kwargs,
+    ):
+        """
+        Initialize the conversation.
+
+        Parameters:
+            player_names (List[str]): Names of the players.
+            parallel (bool): Whether all the players speak in the same turn.
+            spill_dir (str): If specified, older turns of the conversation are spilled to disk in this directory,
+                so that long conversations use a flat amount of memory.
+        """
+        super().__init__(
+            player_names=player_names, parallel=parallel, spill_dir=spill_dir, **kwargs
+        )
 
         self.parallel = parallel
+        self.spill_dir = spill_dir
 
         # The "state" of the environment is maintained by the message pool
-        self.message_pool = MessagePool()
+        self.message_pool = MessagePool(spill_dir=spill_dir)
 
         self._current_turn = 0
         self._next_player_idx = 0
@@ -42,11 +61,19 @@ class Conversation(Environment):
             env_type=self.type_name,
             player_names=self.player_names,
             parallel=self.parallel,
+            spill_dir=self.spill_dir,
         )
 
     def print(self):
         self.message_pool.print()
 
+    def get_state(self) -> Dict:
+        """The turn and the next player, to checkpoint the conversation (see Environment.get_state)."""
+        return {
+            "_current_turn": self._current_turn,
+            "_next_player_idx": self._next_player_idx,
+        }
+
     def get_next_player(self) -> str:
         """Get the next player."""
         return self.player_names[self._next_player_idx]
@@ -60,6 +87,17 @@ class Conversation(Environment):
                 player_name, turn=self._current_turn
             )
 
+    def get_new_messages(
+        self, player_name=None, cursor: int = 0
+    ) -> Tuple[List[Message], int]:
+        """Get the messages added to the observation of the player since the cursor."""
+        if player_name is None:
+            return self.message_pool.get_new_messages(cursor=cursor)
+        else:
+            return self.message_pool.get_new_messages(
+                player_name, cursor, turn=self._current_turn
+            )
+
     def is_terminal(self) -> bool:
         """Check if the conversation is over."""
         # If the last message is the signal, then the conversation is over
@@ -112,8 +150,24 @@ class ModeratedConversation(Conversation):
         parallel: bool = False,
         moderator_visibility="all",
         moderator_period=None,
+        pipeline_terminal_check: bool = False,
         **kwargs,
     ):
+        """
+        Initialize the moderated conversation.
+
+        Parameters:
+            player_names (List[str]): Names of the players.
+            moderator (Union[Moderator, AgentConfig]): The moderator, or its config.
+            parallel (bool): Whether all the players speak in the same turn.
+            moderator_visibility: The players who see the messages of the moderator.
+            moderator_period (str): When the moderator speaks: every "turn" or every "round".
+            pipeline_terminal_check (bool): Whether the moderator checks the terminal condition while the next
+                player is queried, instead of before. If the moderator ends the conversation, the action of the next
+                player is discarded: the step that receives it is terminal and does not append it. The moderator
+                must then not share its backend with the players. Checkpointing the game (see Arena.checkpoint)
+                waits for the pending check.
+        """
         super().__init__(player_names=player_names, parallel=parallel, **kwargs)
 
         if isinstance(moderator, AgentConfig):
@@ -134,6 +188,20 @@ class ModeratedConversation(Conversation):
         else:
             self.moderator_period = moderator_period
 
+        self.pipeline_terminal_check = pipeline_terminal_check
+        self._terminal_check: Future = None  # The pending terminal check of the moderator, if pipelined
+        self._terminal_check_executor = None  # Created on the first pipelined check, shut down when the game ends
+        self._moderator_terminal = False  # Whether the moderator ended the conversation
+
+    def reset(self):
+        self._shutdown_terminal_check()  # The moderator's backend must not be queried after the reset
+        self._moderator_terminal = False
+        return super().reset()
+
+    def end_game(self, end_condition: str):
+        self._shutdown_terminal_check()
+        super().end_game(end_condition)
+
     def to_config(self) -> EnvironmentConfig:
         # This environment contains some special config arguments that needs to be handle specially
         return EnvironmentConfig(
@@ -143,8 +211,44 @@ class ModeratedConversation(Conversation):
             moderator=self.moderator.to_config(),
             moderator_visibility=self.moderator_visibility,
             moderator_period=self.moderator_period,
+            pipeline_terminal_check=self.pipeline_terminal_check,
+            spill_dir=self.spill_dir,
         )
 
+    def get_state(self) -> Dict:
+        """The state of the conversation, with the state of the moderator (see Player.get_state)."""
+        state = super().get_state()
+        state["_moderator_terminal"] = self._resolve_terminal_check()
+        state["moderator"] = self.moderator.get_state()
+        return state
+
+    def set_state(self, state: Dict):
+        state = dict(state)
+        self._shutdown_terminal_check()  # A pending check belongs to the previous game
+        self.moderator.set_state(state.pop("moderator"))
+        super().set_state(state)
+
+    def _resolve_terminal_check(self) -> bool:
+        """Wait for the pending terminal check of the moderator, if any. Returns whether the moderator ended the conversation."""
+        if self._terminal_check is not None:
+            # A check that failed raises its error once: the game can then be reset
+            terminal_check, self._terminal_check = self._terminal_check, None
+            self._moderator_terminal = terminal_check.result()
+        return self._moderator_terminal
+
+    def _shutdown_terminal_check(self):
+        """Wait for the pending terminal check of the moderator, and stop the thread that runs the checks."""
+        try:
+            self._resolve_terminal_check()
+        finally:
+            if self._terminal_check_executor is not None:
+                self._terminal_check_executor.shutdown()
+                self._terminal_check_executor = None
+
+    def is_terminal(self) -> bool:
+        """Check if the conversation is over, waiting for the pending terminal check of the moderator."""
+        return self._resolve_terminal_check() or bool(super().is_terminal())
+
     def step(self, player_name: str, action: str) -> TimeStep:
         """
         Step function that is called by the arena.
@@ -153,6 +257,15 @@ class ModeratedConversation(Conversation):
             player_name: the name of the player that takes the action
             action: the action that the agents wants to take
         """
+        if self._resolve_terminal_check():
+            # The moderator ended the conversation while the action was generated: the action is discarded
+            self._shutdown_terminal_check()
+            return TimeStep(
+                observation=self.get_observation(),
+                reward=self.get_zero_rewards(),
+                terminal=True,
+            )
+
         message = Message(
             agent_name=player_name, content=action, turn=self._current_turn
         )
@@ -174,11 +287,24 @@ class ModeratedConversation(Conversation):
                 visible_to=self.moderator_visibility,
             )
             self.message_pool.append_message(moderator_message)
-            terminal = (
-                self.moderator.is_terminal(moderator_history) or self.is_terminal()
-            )
+            # The moderator decides whether the conversation is over with its own response in the history
+            moderator_history = self.message_pool.get_all_messages()
+            if self.pipeline_terminal_check:
+                # The moderator checks the terminal condition while the next player is queried: the next step waits
+                # for its decision
+                if self._terminal_check_executor is None:
+                    self._terminal_check_executor = ThreadPoolExecutor(max_workers=1)
+                self._terminal_check = self._terminal_check_executor.submit(
+                    self.moderator.is_terminal, list(moderator_history)
+                )
+                terminal = bool(Conversation.is_terminal(self))
+            else:
+                self._moderator_terminal = self.moderator.is_terminal(moderator_history)
+                terminal = self.is_terminal()
         else:
             terminal = self.is_terminal()
+        if terminal:
+            self._shutdown_terminal_check()
 
         # Update the counters
         if not self.parallel or self._next_player_idx == 0:
@@ -1,5 +1,5 @@
 import re
-from typing import List, Union
+from typing import List, Tuple, Union
 
 from pettingzoo.classic import tictactoe_v3
 
@@ -62,6 +62,17 @@ class PettingzooTicTacToe(Environment):
                 player_name, turn=self.turn + 1
             )
 
+    def get_new_messages(
+        self, player_name=None, cursor: int = 0
+    ) -> Tuple[List[Message], int]:
+        """Get the messages added to the observation of the player since the cursor."""
+        if player_name is None:
+            return self.message_pool.get_new_messages(cursor=cursor)
+        else:
+            return self.message_pool.get_new_messages(
+                player_name, cursor, turn=self.turn + 1
+            )
+
     def _moderator_speak(self, text: str, visible_to: Union[str, List[str]] = "all"):
         """Moderator say something."""
         message = Message(
@@ -1,12 +1,10 @@
-import yaml
-import random
 import re
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 
 from ..agent import SIGNAL_END_OF_CONVERSATION
 from ..message import Message, MessagePool
 from .base import Environment, TimeStep, register_env
-from ..utils import extract_jsons_spyfall
+from ..utils import extract_jsons_spyfall, load_prompt_config
 
 
 DEFAULT_TOPIC_CODES = {
@@ -63,6 +61,8 @@ class SpyFall(Environment):
         prompt_config_file: str,
         player_names: List[str],
         restrict_info: bool = False,
+        simultaneous_votes: bool = False,
+        retry_format_errors: bool = False,
         topic_codes: Dict[str, List[str]] = None,
         **kwargs,
     ):
@@ -74,7 +74,6 @@ class SpyFall(Environment):
 
         # The "state" of the environment is maintained by the message pool
         self.message_pool = MessagePool()
-        self.permanent_message_pool = MessagePool()
 
         # Randomly sample a topic, code and spy player
         self.topic = None
@@ -89,16 +88,20 @@ class SpyFall(Environment):
         self._players_votes = None
         self._initialized = False
         self._end_condition = None
+        self._is_terminal = False
         self._prompt_config_mode = prompt_config_mode
         self._prompt_config_prompt_config_file = prompt_config_file
         self.restrict_info = restrict_info
+        # Whether the players vote at the same time, without seeing the votes of the others
+        self.simultaneous_votes = simultaneous_votes
+        # Whether the responses in the wrong format are rejected by check_action instead of ending the game
+        self.retry_format_errors = retry_format_errors
 
         # number of roungs
         self._ONE_ROUND = False
 
         # Reading prompt configs
-        with open(self._prompt_config_prompt_config_file, "r") as file:
-            self._prompts = yaml.safe_load(file)
+        self._prompts = load_prompt_config(self._prompt_config_prompt_config_file)
 
         self.reset()  # To initialize the game (select topic, code, spy)
 
@@ -106,16 +109,26 @@ class SpyFall(Environment):
         """Get the next player."""
         return self.player_names[self._next_player_idx]
 
+    def get_simultaneous_players(self) -> List[str]:
+        """In simultaneous_votes mode, the players still in the game vote at the same time."""
+        if (
+            self.simultaneous_votes
+            and self._current_phase == "accuse"
+            and self._next_player_idx == 0
+        ):
+            return list(self.player_names)
+        return []
+
     def reset(self):
         """Sample topic, code and spy code."""
-        self.topic = random.choice(list(self.topic_codes.keys()))
+        self.topic = self.rng.choice(list(self.topic_codes.keys()))
         #self.code = random.choice(self.topic_codes[self.topic])
-        self.spy_name = random.choice(self.player_names)
+        self.spy_name = self.rng.choice(self.player_names)
         self.non_spy_names = [
             name for name in self.player_names if name != self.spy_name
         ]
-        self.spy_word = random.choice(self.topic_codes[self.topic])
-        self.non_spy_word = random.choice(self.topic_codes[self.topic])
+        self.spy_word = self.rng.choice(self.topic_codes[self.topic])
+        self.non_spy_word = self.rng.choice(self.topic_codes[self.topic])
 
         self._current_turn = 0
         self._next_player_idx = 0
@@ -171,6 +184,17 @@ class SpyFall(Environment):
                 player_name, turn=self._current_turn
             )
 
+    def get_new_messages(
+        self, player_name=None, cursor: int = 0
+    ) -> Tuple[List[Message], int]:
+        """Get the messages added to the observation of the player since the cursor."""
+        if player_name is None:
+            return self.message_pool.get_new_messages(cursor=cursor)
+        else:
+            return self.message_pool.get_new_messages(
+                player_name, cursor, turn=self._current_turn
+            )
+
     def _text2vote(self, text) -> str:
         """Convert text to vote, return a player's name."""
         # lower = text.lower().replace("[", "").replace("]", "").replace(".", "")
@@ -268,6 +292,30 @@ class SpyFall(Environment):
 
         return metrics
 
+    def end_game(self, end_condition: str):
+        self._end_condition = end_condition
+        self._is_terminal = True
+
+    def get_state(self) -> Dict:
+        """The game state, to checkpoint the game (see Environment.get_state)."""
+        return {
+            "player_names": list(self.player_names),  # The players voted out are removed
+            "topic": self.topic,
+            "code": self.code,
+            "spy_name": self.spy_name,
+            "non_spy_names": self.non_spy_names,
+            "spy_word": self.spy_word,
+            "non_spy_word": self.non_spy_word,
+            "_current_turn": self._current_turn,
+            "_next_player_idx": self._next_player_idx,
+            "_current_phase": self._current_phase,
+            "_players_votes": dict(self._players_votes),
+            "_initialized": self._initialized,
+            "_end_condition": self._end_condition,
+            "_is_terminal": self._is_terminal,
+            "_ONE_ROUND": self._ONE_ROUND,
+        }
+
     def _get_word_and_argument(self, action, json_list, response_format):
         if response_format == "json":
             try:
@@ -289,6 +337,20 @@ class SpyFall(Environment):
             arguments = action
         return word, arguments, None
 
+    def check_format(self, action: str, player_name: str) -> bool:
+        """A JSON response must be a single object with the word and the arguments read by _get_word_and_argument."""
+        if self._prompts[self._prompt_config_mode]["response_format"] != "json":
+            return True
+        json_list = extract_jsons_spyfall(action)
+        if len(json_list) != 1:
+            return False
+        try:
+            json_list[0]["properties"]["word"]["description"]
+            json_list[0]["properties"]["arguments"]["description"]
+        except (KeyError, TypeError):
+            return False
+        return True
+
     def step(self, player_name: str, action: str) -> TimeStep:
         """
         Step function that is called by the arena.
@@ -458,9 +520,8 @@ class SpyFall(Environment):
 
                 if not accuse_correct:
                     if self.restrict_info:
-                        for message in self.message_pool._messages:
-                            self.permanent_message_pool.append_message(message)
-                        self.message_pool.reset()
+                        # The players only see the messages of the new epoch
+                        self.message_pool.new_epoch()
 
                         self._moderator_speak(
                             self._prompts[self._prompt_config_mode][
@@ -545,7 +606,7 @@ class SpyFall(Environment):
 
             if self.restrict_info:
                 timestep = TimeStep(
-                    observation=self.permanent_message_pool.get_all_messages(),
+                    observation=self.message_pool.get_history(),
                     reward=rewards,
                     terminal=terminal,
                 )
@@ -1,6 +1,6 @@
 # pyright: reportGeneralTypeIssues=false
 
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 
 from langchain.prompts import PromptTemplate
 from pettingzoo.utils import agent_selector
@@ -27,13 +27,17 @@ class UmshiniBaseEnv(Environment):
         moderator_prompt_input: str,
         character_limit: int = 4000,
         round_length: int = 10,
+        spill_dir: str = None,
         **kwargs,
     ):
         """Base environment for all Umshini game environments.
 
         Must call super().reset() if being overwritten.
+
+        If spill_dir is specified, older turns of the conversation are spilled to disk in this directory.
         """
-        super().__init__(player_names=player_names, **kwargs)
+        super().__init__(player_names=player_names, spill_dir=spill_dir, **kwargs)
+        self._spill_dir = spill_dir
         self._initialized = False
         self._moderator_prompt_template = moderator_prompt_template
         self._moderator_prompt_input = moderator_prompt_input
@@ -49,7 +53,7 @@ class UmshiniBaseEnv(Environment):
 
         Must call super().reset() if being overwritten, call moderator_speak, and return the timestep.
         """
-        self.message_pool = MessagePool()
+        self.message_pool = MessagePool(spill_dir=self._spill_dir)
         self._current_turn = 0
         self._next_player_idx = 0
         self._current_phase_length = 0
@@ -136,6 +140,17 @@ class UmshiniBaseEnv(Environment):
                 player_name, turn=self._current_turn + 1
             )
 
+    def get_new_messages(
+        self, player_name: str = None, cursor: int = 0
+    ) -> Tuple[List[Message], int]:  # type: ignore
+        """Get the messages added to the observation of the player since the cursor."""
+        if player_name is None:
+            return self.message_pool.get_new_messages(cursor=cursor)
+        else:
+            return self.message_pool.get_new_messages(
+                player_name, cursor, turn=self._current_turn + 1
+            )
+
     def is_terminal(self) -> bool:
         """Check if the conversation is over."""
         return self._current_phase == "end"
@@ -4,7 +4,6 @@ from __future__ import annotations
 
 import ast
 import os
-import random
 
 from langchain.chat_models import AzureChatOpenAI, ChatOpenAI
 from langchain.prompts import PromptTemplate
@@ -65,8 +64,8 @@ Your first response should be an opening statement.""",
         if self.disable_judging:
             # Local API testing
             scores = {
-                self.player_names[0]: random.randint(0, 10),
-                self.player_names[1]: random.randint(0, 10),
+                self.player_names[0]: self.rng.randint(0, 10),
+                self.player_names[1]: self.rng.randint(0, 10),
             }
             scores_text = f"SCORES: {scores}"
         else:
@@ -217,6 +217,8 @@ class PettingZooCompatibilityV0(AECEnv, EzPickle):
         # Custom attributes for housekeeping
         self.total_rewards = {agent: 0.0 for agent in self.possible_agents}
         self.current_turn = 0
+        self._cursors = {}  # agent -> cursor of the messages already read
+        self._histories = {}  # agent -> messages read so far, latest turn and its messages
 
     @functools.lru_cache(maxsize=None)
     def observation_space(self, agent: AgentID):
@@ -302,6 +304,36 @@ class PettingZooCompatibilityV0(AECEnv, EzPickle):
                             + Fore.BLACK
                         )
 
+    def _read_new_messages(self, agent: AgentID | None = None) -> dict:
+        """Read the messages added since the last read, and update the agent's history with them.
+
+        Args:
+            agent (Optional[AgentID]): agent, or None for all the messages
+
+        Returns:
+            history: dict with the keys turn, turn_messages, all_messages and all_messages_string
+        """
+        new_messages, self._cursors[agent] = self._env.get_new_messages(
+            agent, self._cursors.get(agent, 0)
+        )
+        history = self._histories.setdefault(
+            agent,
+            {
+                "turn": 0,
+                "turn_messages": [],
+                "all_messages": [],
+                "all_messages_string": "",
+            },
+        )
+        for m in new_messages:
+            if m.turn != history["turn"]:
+                history["turn"], history["turn_messages"] = m.turn, []
+            history["turn_messages"].append(m)
+            history["all_messages"].append(m)
+            if self.string_observation:
+                history["all_messages_string"] += f"[{m.agent_name}->all]: {m.content}\n"
+        return history
+
     def observe(self, agent: AgentID) -> ObsType:
         """Observe.
 
@@ -319,16 +351,14 @@ class PettingZooCompatibilityV0(AECEnv, EzPickle):
             raise TypeError("AgentID must be a string")
         else:
             # get only the messages that this agent can see
-            messages = self._env.get_observation(agent)
+            history = self._read_new_messages(agent)
+            messages = history["all_messages"]
 
             # calculate current turn
-            if len(messages) > 0:
-                self.current_turn = messages[-1].turn
-            else:
-                self.current_turn = 0
+            self.current_turn = history["turn"]
 
             # filter to only new messages for this agent (observation is limited to only the current message)
-            new_messages = [m for m in messages if m.turn == self.current_turn]
+            new_messages = list(history["turn_messages"])
 
             # string observation (optional flag)
             if self.string_observation:
@@ -380,10 +410,7 @@ class PettingZooCompatibilityV0(AECEnv, EzPickle):
 
             # info: generate string of full chat log
             if self.string_observation:
-                all_messages_string = ""
-                for m in messages:
-                    all_messages_string += f"[{m.agent_name}->all]: {m.content}\n"
-                self.infos[agent]["all_messages_string"] = all_messages_string
+                self.infos[agent]["all_messages_string"] = history["all_messages_string"]
 
             # info: environment specific information
             if hasattr(self, "restricted_action"):
@@ -426,16 +453,14 @@ class PettingZooCompatibilityV0(AECEnv, EzPickle):
 
     def _unravel_timestep(self, timestep: TimeStep):
         # get observation
-        messages = timestep.observation
+        history = self._read_new_messages()
+        messages = history["all_messages"]
 
         # calculate current turn
-        if len(messages) > 0:
-            self.current_turn = messages[-1].turn
-        else:
-            self.current_turn = 0
+        self.current_turn = history["turn"]
 
         # filter to only new messages (observation is limited to only the current message)
-        new_messages = [m for m in messages if m.turn == self.current_turn]
+        new_messages = list(history["turn_messages"])
 
         # string observation (optional flag)
         if self.string_observation:
@@ -468,10 +493,7 @@ class PettingZooCompatibilityV0(AECEnv, EzPickle):
 
         # info: generate string of full chat log
         if self.string_observation:
-            all_messages_string = ""
-            for m in messages:
-                all_messages_string += f"[{m.agent_name}->all]: {m.content}\n"
-            info["all_messages_string"] = all_messages_string
+            info["all_messages_string"] = history["all_messages_string"]
 
         # Role in debate environment
         if self.env_name == "debate":
@@ -524,6 +546,8 @@ class PettingZooCompatibilityV0(AECEnv, EzPickle):
 
         # reset the ChatArena environment
         self.initial_timestep = self._env.reset()
+        self._cursors = {}
+        self._histories = {}
 
         # reset the PettingZoo wrapper
         self.agents = self.possible_agents[:]
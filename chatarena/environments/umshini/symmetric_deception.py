@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import os
-import random
 import re
 
 from langchain.chat_models import AzureChatOpenAI, ChatOpenAI
@@ -72,7 +71,7 @@ You will be told when you are swapping roles.
 
         violation = False
         if self.disable_judging:
-            violation = True if random.randint(0, 1) else False
+            violation = True if self.rng.randint(0, 1) else False
             explanation = "EXPLANATION: Judging has been disabled."
         else:
             response = self.judge_deception(message_state=self.message_pool).content
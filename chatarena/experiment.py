@@ -0,0 +1,255 @@
+"""
+Run the games of an experiment concurrently.
+
+The experiment scripts play many independent games (prompt modes x repetitions). Most of the time of a game is
+spent waiting for the backends, so the games are run as asyncio tasks (see Arena.async_step), with a bound on the
+number of games in flight, and each game is saved to its own chat file as soon as it ends.
+When the games are CPU-bound (e.g. local models), run_sharded_experiments splits them between processes.
+With a checkpoint directory, a game that crashes is resumed from its last checkpoint when the experiment is run
+again, instead of being replayed from the start.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Union
+
+from .arena import Arena
+from .environments import TimeStep
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+@dataclass
+class GameResult:
+    """
+    The outcome of one game of an experiment.
+
+    Attributes:
+        game_idx (int): Index of the game in the experiment.
+        path (str): The chat file of the game, None if it was not saved.
+        disposition (Dict): The disposition of the environment (e.g. the roles and the words).
+        metrics (Dict): The metrics of the game (see Arena.get_metrics).
+        duration (float): Wall time of the game, in seconds.
+        error (str): The error that stopped the game, None if it ran to the end.
+    """
+
+    game_idx: int
+    path: str = None
+    disposition: Dict = None
+    metrics: Dict = None
+    duration: float = 0.0
+    error: str = None
+
+
+async def play_game(arena: Arena, max_steps: int = None) -> TimeStep:
+    """
+    Play a game until it ends or reaches `max_steps` (see Arena.async_run_episode).
+
+    If the arena has a checkpoint_path and the checkpoint exists, the game is resumed from it instead of reset.
+    A player that makes too many invalid actions ends the game.
+    """
+    timestep, _ = await arena.async_run_episode(max_steps=max_steps)
+    return timestep
+
+
+def game_seed(seed: int, game_idx: int) -> int:
+    """The seed of a game of an experiment, which only depends on the seed of the experiment and the game index."""
+    return random.Random(f"{seed}:{game_idx}").getrandbits(32)
+
+
+async def async_run_experiments(
+    arena_factory: Callable[[int], Arena],
+    num_games: int,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_steps: int = None,
+    output_dir: Union[str, Callable[[int], str]] = None,
+    prefix: str = "game",
+    verbose: bool = True,
+    seed: int = None,
+    checkpoint_dir: str = None,
+    checkpoint_interval: int = 1,
+    game_indices: Iterable[int] = None,
+) -> List[GameResult]:
+    """Async version of run_experiments()."""
+    if game_indices is None:
+        game_indices = range(num_games)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    start_time = time.perf_counter()
+    num_done = 0
+
+    async def run_game(game_idx: int) -> GameResult:
+        nonlocal num_done
+        result = GameResult(game_idx=game_idx)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                arena = arena_factory(game_idx)
+                # Every game samples from its own generator: the games in flight do not share the global one
+                arena.environment.seed(None if seed is None else game_seed(seed, game_idx))
+                if checkpoint_dir is not None:
+                    os.makedirs(checkpoint_dir, exist_ok=True)
+                    arena.checkpoint_path = os.path.join(checkpoint_dir, f"{prefix}_{game_idx:03d}.ckpt")
+                    arena.checkpoint_interval = checkpoint_interval
+                await play_game(arena, max_steps=max_steps)
+                result.disposition = arena.environment.get_disposition()
+                result.metrics = arena.get_metrics()
+                if output_dir is not None:
+                    game_dir = output_dir(game_idx) if callable(output_dir) else output_dir
+                    os.makedirs(game_dir, exist_ok=True)
+                    result.path = os.path.join(
+                        game_dir,
+                        f"{prefix}_{time.strftime('%Y_%m_%d_%H_%M_%S')}_{game_idx:03d}.json",
+                    )
+                    arena.save_chat(result.path)
+                if arena.checkpoint_path is not None and os.path.exists(arena.checkpoint_path):
+                    os.remove(arena.checkpoint_path)  # The game is over: it will not be resumed
+            except Exception as e:
+                logging.exception(f"Game {game_idx} failed")
+                result.error = repr(e)
+            result.duration = time.perf_counter() - start
+
+        num_done += 1
+        if verbose:
+            outcome = result.error or (result.metrics or {}).get("end_condition", "done")
+            print(
+                f"[{num_done}/{num_games}] game {game_idx}: {outcome} "
+                f"in {result.duration:.1f}s ({time.perf_counter() - start_time:.1f}s elapsed)"
+            )
+        return result
+
+    return await asyncio.gather(*(run_game(game_idx) for game_idx in game_indices))
+
+
+def run_experiments(
+    arena_factory: Callable[[int], Arena],
+    num_games: int,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_steps: int = None,
+    output_dir: Union[str, Callable[[int], str]] = None,
+    prefix: str = "game",
+    verbose: bool = True,
+    seed: int = None,
+    checkpoint_dir: str = None,
+    checkpoint_interval: int = 1,
+) -> List[GameResult]:
+    """
+    Run the games of an experiment concurrently.
+
+    The games must not share stateful objects: the factory should create new players, backends and environment
+    for every game. The environment of every game is given its own random generator (see Environment.seed), since
+    the games run concurrently: a factory that samples at random (e.g. the order of the players) should use its own
+    generator too, seeded with game_seed(seed, game_idx).
+
+    Parameters:
+        arena_factory (Callable[[int], Arena]): Creates the arena of a game from its index.
+        num_games (int): Number of games to play.
+        max_concurrency (int): Maximum number of games played at the same time.
+        max_steps (int): Maximum number of steps of a game. Defaults to None, which plays until the game ends.
+        output_dir (Union[str, Callable[[int], str]]): If specified, each game is saved with Arena.save_chat in
+            this directory, or in the directory returned for its index (e.g. chat_history/<prompt_mode>).
+        prefix (str): Prefix of the chat files, e.g. the name of the game.
+        verbose (bool): Whether to print a line when a game ends.
+        seed (int): If specified, the environment of each game is seeded with game_seed(seed, idx) before it is
+            reset, so the topic, words and roles that it samples only depend on the game index. Defaults to None,
+            which seeds the environments from the system.
+        checkpoint_dir (str): If specified, each game is checkpointed in this directory every
+            `checkpoint_interval` steps (see Arena.checkpoint). The checkpoint of a game is deleted when the game
+            ends, so running the experiment again resumes the games that crashed.
+        checkpoint_interval (int): Number of steps between two checkpoints of a game.
+
+    Returns:
+        List[GameResult]: The result of every game, in the order of their indices.
+    """
+    return asyncio.run(
+        async_run_experiments(
+            arena_factory,
+            num_games,
+            max_concurrency=max_concurrency,
+            max_steps=max_steps,
+            output_dir=output_dir,
+            prefix=prefix,
+            verbose=verbose,
+            seed=seed,
+            checkpoint_dir=checkpoint_dir,
+            checkpoint_interval=checkpoint_interval,
+        )
+    )
+
+
+def _run_shard(arena_factory, game_indices: List[int], kwargs: Dict) -> List[GameResult]:
+    """Run the games of a shard in a worker process."""
+    return asyncio.run(
+        async_run_experiments(arena_factory, len(game_indices), game_indices=game_indices, **kwargs)
+    )
+
+
+def run_sharded_experiments(
+    arena_factory: Callable[[int], Arena],
+    num_games: int,
+    num_workers: int = None,
+    num_shards: int = None,
+    seed: int = 0,
+    max_concurrency: int = 1,
+    max_steps: int = None,
+    output_dir: Union[str, Callable[[int], str]] = None,
+    prefix: str = "game",
+    verbose: bool = True,
+    checkpoint_dir: str = None,
+    checkpoint_interval: int = 1,
+) -> List[GameResult]:
+    """
+    Run the games of an experiment in a pool of processes.
+
+    The games are split into shards, which run on a ProcessPoolExecutor: each shard runs its games with
+    run_experiments in a worker process. Every game is seeded with game_seed(seed, idx), so the same games give
+    the same dispositions whatever the number of workers and shards.
+
+    The factory and output_dir are sent to the workers, so they must be picklable: define them at the top level of
+    a module, and run the experiment under `if __name__ == "__main__":`.
+
+    Parameters:
+        arena_factory (Callable[[int], Arena]): Creates the arena of a game from its index.
+        num_games (int): Number of games to play.
+        num_workers (int): Number of worker processes. Defaults to the number of CPUs.
+        num_shards (int): Number of shards. Defaults to the number of workers.
+        seed (int): The seed of the experiment.
+        max_concurrency (int): Maximum number of games played at the same time by a worker.
+        max_steps (int): Maximum number of steps of a game.
+        output_dir (Union[str, Callable[[int], str]]): Where to save the games (see run_experiments).
+        prefix (str): Prefix of the chat files.
+        verbose (bool): Whether to print a line when a game ends.
+        checkpoint_dir (str): Where to checkpoint the games (see run_experiments).
+        checkpoint_interval (int): Number of steps between two checkpoints of a game.
+
+    Returns:
+        List[GameResult]: The result of every game, in the order of their indices.
+    """
+    num_workers = num_workers or os.cpu_count()
+    num_shards = num_shards or num_workers
+    kwargs = {
+        "max_concurrency": max_concurrency,
+        "max_steps": max_steps,
+        "output_dir": output_dir,
+        "prefix": prefix,
+        "verbose": verbose,
+        "seed": seed,
+        "checkpoint_dir": checkpoint_dir,
+        "checkpoint_interval": checkpoint_interval,
+    }
+    # Interleave the games between the shards, so that each shard gets some games of every prompt mode
+    shards = [list(range(shard, num_games, num_shards)) for shard in range(num_shards)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(_run_shard, arena_factory, shard, kwargs)
+            for shard in shards
+            if shard
+        ]
+        for future in futures:
+            results.extend(future.result())
+    return sorted(results, key=lambda result: result.game_idx)
@@ -0,0 +1,125 @@
+"""
+Step lifecycle hooks of the Arena.
+
+Metrics, tracing, loggers and dashboards attach to the arena through a HookRegistry instead of changing
+Arena.step. The arena emits an event at each point of the lifecycle of a step:
+
+    before_observation(arena, player_name)                   before a player observes the environment
+    before_query(arena, player, observation)                 before a player's backend is queried
+    after_query(arena, player, actions, latency, retries)    after the query, with its wall time (in seconds) and the
+                                                             number of invalid attempts before it
+    after_env_step(arena, timestep)                          after the environment applied the action(s)
+    on_terminal(arena, timestep)                             after the step that ended the game
+
+A hook is a plain callback registered for one event, or an ArenaHook whose overridden methods are registered
+for the events of the same name. Emitting an event that has no callback is a dictionary lookup.
+In a simultaneous phase (see Environment.get_simultaneous_players), the query events of the players are emitted
+from worker threads.
+"""
+from typing import Callable, Dict, List
+
+HOOK_EVENTS = (
+    "before_observation",
+    "before_query",
+    "after_query",
+    "after_env_step",
+    "on_terminal",
+)
+
+
+class ArenaHook:
+    """
+    Base class of the hooks that consume several events.
+
+    Override the methods of the events to consume; HookRegistry.add only registers the overridden methods.
+    """
+
+    def before_observation(self, arena, player_name: str):
+        pass
+
+    def before_query(self, arena, player, observation):
+        pass
+
+    def after_query(self, arena, player, actions: List[str], latency: float, retries: int):
+        pass
+
+    def after_env_step(self, arena, timestep):
+        pass
+
+    def on_terminal(self, arena, timestep):
+        pass
+
+    def get_metrics(self) -> Dict:
+        """The metrics of the hook, added to the metrics of the game (see Arena.get_metrics)."""
+        return {}
+
+    def get_state(self) -> Dict:
+        """The state the hook keeps during a game, to checkpoint the game (see Arena.checkpoint). Empty by default."""
+        return {}
+
+    def set_state(self, state: Dict):
+        """Restore a state returned by get_state."""
+        pass
+
+
+class HookRegistry:
+    """The callbacks registered for each event of the lifecycle of a step."""
+
+    def __init__(self):
+        self._callbacks: Dict[str, List[Callable]] = {event: [] for event in HOOK_EVENTS}
+        self._hooks: List[ArenaHook] = []  # The hooks registered with add
+
+    def register(self, event: str, callback: Callable) -> Callable:
+        """
+        Register a callback for an event. Returns the callback, so it can be used as a decorator.
+
+        Parameters:
+            event (str): One of HOOK_EVENTS.
+            callback (Callable): Called with the arguments of the event.
+        """
+        if event not in self._callbacks:
+            raise ValueError(f"Unknown hook event {event}, expected one of {HOOK_EVENTS}")
+        self._callbacks[event].append(callback)
+        return callback
+
+    def unregister(self, event: str, callback: Callable):
+        """Remove a callback registered for an event."""
+        self._callbacks[event].remove(callback)
+
+    def add(self, hook: ArenaHook) -> ArenaHook:
+        """Register the methods of a hook that override the events of ArenaHook."""
+        for event in HOOK_EVENTS:
+            if getattr(type(hook), event) is not getattr(ArenaHook, event):
+                self.register(event, getattr(hook, event))
+        self._hooks.append(hook)
+        return hook
+
+    def remove(self, hook: ArenaHook):
+        """Remove the methods of a hook registered with add."""
+        for event in HOOK_EVENTS:
+            if getattr(type(hook), event) is not getattr(ArenaHook, event):
+                self.unregister(event, getattr(hook, event))
+        self._hooks.remove(hook)
+
+    def get_metrics(self) -> Dict:
+        """The metrics of the hooks registered with add."""
+        metrics = {}
+        for hook in self._hooks:
+            metrics.update(hook.get_metrics())
+        return metrics
+
+    def get_state(self) -> List[Dict]:
+        """The states of the hooks registered with add, in the order they were added."""
+        return [hook.get_state() for hook in self._hooks]
+
+    def set_state(self, states: List[Dict]):
+        """Restore the states returned by get_state. The same hooks must have been added in the same order."""
+        if len(states) != len(self._hooks):
+            raise ValueError(f"Expected the states of {len(self._hooks)} hooks, got {len(states)}")
+        for hook, state in zip(self._hooks, states):
+            hook.set_state(state)
+
+    def emit(self, event: str, *args):
+        """Call the callbacks of an event, in the order they were registered."""
+        for callback in self._callbacks[event]:
+            callback(*args)
@@ -0,0 +1,157 @@
+"""
+Early termination of the games whose players are stuck in a loop.
+
+Players sometimes repeat near-identical clues or guesses until the step limit, which burns the remaining backend
+calls of the game. A LoopDetector is a hook of the arena (see chatarena.hooks) that compares each new message of a
+player with the recent messages of the same player, and ends the game with the "LE" (Loop Error) end condition once
+a player has repeated itself too many times in a row.
+
+Two messages are compared by the Jaccard similarity of the hashes of their word n-grams, so a message is only
+tokenized once, and a repetition that rewords a few words is still detected.
+"""
+import re
+import threading
+import zlib
+from collections import deque
+from typing import Deque, Dict, FrozenSet
+
+from .hooks import ArenaHook
+
+LOOP_END_CONDITION = "LE"  # Loop Error
+
+
+def ngram_hashes(text: str, n: int = 3) -> FrozenSet[int]:
+    """
+    The hashes of the word n-grams of a text, ignoring case and punctuation.
+
+    The hashes are CRC32 checksums rather than hash(), which is salted per process: the hashes saved in a
+    checkpoint still match the hashes of the process that resumes it.
+
+    Parameters:
+        text (str): The text.
+        n (int): The number of words of the n-grams. A text with fewer words has a single n-gram, its words.
+
+    Returns:
+        FrozenSet[int]: The hashes of the n-grams.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= n:
+        return frozenset((zlib.crc32(" ".join(words).encode()),))
+    return frozenset(
+        zlib.crc32(" ".join(words[i : i + n]).encode()) for i in range(len(words) - n + 1)
+    )
+
+
+def similarity(hashes: FrozenSet[int], other_hashes: FrozenSet[int]) -> float:
+    """The Jaccard similarity of two sets of n-gram hashes."""
+    if not hashes and not other_hashes:
+        return 1.0
+    return len(hashes & other_hashes) / len(hashes | other_hashes)
+
+
+class LoopDetector(ArenaHook):
+    """
+    Ends the game when a player repeats itself.
+
+    A message of a player is a repetition when its similarity (see similarity) with one of the last `window` messages
+    of the player reaches `threshold`. After `max_repetitions` repetitions in a row by the same player, the game is
+    ended with Environment.end_game, and the step is terminal.
+
+    The metrics of the detector (see Arena.get_metrics) are:
+        loop_detected (bool): Whether the game was ended by the detector.
+        loop_saved_calls (int): The backend queries the game would still have made until `max_steps`, estimated from
+            the average number of queries per step. 0 if the game was not ended by the detector, or if `max_steps`
+            is not specified.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        max_repetitions: int = 3,
+        window: int = 3,
+        n: int = 3,
+        max_steps: int = None,
+        end_condition: str = LOOP_END_CONDITION,
+    ):
+        """
+        Parameters:
+            threshold (float): The similarity from which a message is a repetition.
+            max_repetitions (int): The number of repetitions in a row that ends the game.
+            window (int): The number of recent messages of a player a new message is compared with.
+            n (int): The number of words of the n-grams.
+            max_steps (int): The step limit of the game, to estimate the saved queries.
+            end_condition (str): The end condition of the games ended by the detector.
+        """
+        self.threshold = threshold
+        self.max_repetitions = max_repetitions
+        self.window = window
+        self.n = n
+        self.max_steps = max_steps
+        self.end_condition = end_condition
+        self._lock = threading.Lock()  # The query events of a simultaneous phase come from worker threads
+        self._reset()
+
+    def _reset(self):
+        self._recent: Dict[str, Deque[FrozenSet[int]]] = {}  # Player name -> hashes of its last messages
+        self._repetitions: Dict[str, int] = {}  # Player name -> repetitions in a row
+        self._cursor = 0  # Cursor of the messages already read, see Environment.get_new_messages
+        self._num_queries = 0
+        self.loop_step = None  # The step at which the loop was detected
+
+    def before_observation(self, arena, player_name: str):
+        if arena.num_steps == 0:
+            self._reset()  # A new game
+
+    def after_query(self, arena, player, actions, latency: float, retries: int):
+        with self._lock:
+            self._num_queries += 1
+
+    def after_env_step(self, arena, timestep):
+        new_messages, self._cursor = arena.environment.get_new_messages(cursor=self._cursor)
+        if timestep.terminal:
+            return
+
+        player_names = arena.name_to_player
+        for message in new_messages:
+            if message.agent_name not in player_names:
+                continue
+            hashes = ngram_hashes(message.content, self.n)
+            recent = self._recent.setdefault(message.agent_name, deque(maxlen=self.window))
+            if any(similarity(hashes, other) >= self.threshold for other in recent):
+                self._repetitions[message.agent_name] = self._repetitions.get(message.agent_name, 0) + 1
+            else:
+                self._repetitions[message.agent_name] = 0
+            recent.append(hashes)
+
+            if self._repetitions[message.agent_name] >= self.max_repetitions:
+                self.loop_step = arena.num_steps
+                arena.environment.end_game(self.end_condition)
+                timestep["terminal"] = True
+                return
+
+    def get_state(self) -> Dict:
+        """The recent messages, the repetitions, the cursor and the query count of the game."""
+        with self._lock:
+            return {
+                "recent": {name: list(recent) for name, recent in self._recent.items()},
+                "repetitions": dict(self._repetitions),
+                "cursor": self._cursor,
+                "num_queries": self._num_queries,
+                "loop_step": self.loop_step,
+            }
+
+    def set_state(self, state: Dict):
+        with self._lock:
+            self._recent = {
+                name: deque(recent, maxlen=self.window) for name, recent in state["recent"].items()
+            }
+            self._repetitions = dict(state["repetitions"])
+            self._cursor = state["cursor"]
+            self._num_queries = state["num_queries"]
+            self.loop_step = state["loop_step"]
+
+    def get_metrics(self) -> Dict:
+        saved_calls = 0
+        if self.loop_step is not None and self.max_steps is not None:
+            saved_calls = round(self._num_queries / self.loop_step * max(self.max_steps - self.loop_step, 0))
+        return {"loop_detected": self.loop_step is not None, "loop_saved_calls": saved_calls}
@@ -1,13 +1,34 @@
+import contextlib
 import hashlib
+import json
+import mmap
+import os
+import sys
+import tempfile
+import threading
 import time
-from dataclasses import dataclass
-from typing import List, Union
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from itertools import chain, islice
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Union
 from uuid import uuid1
 
 # Preserved roles
 SYSTEM_NAME = "System"
 MODERATOR_NAME = "Moderator"
 
+# Visibility mask of the messages that are visible to all the agents (every bit set)
+VISIBLE_TO_ALL = -1
+
+# Number of most recent turns kept in memory by a spilling MessagePool
+DEFAULT_HOT_TURNS = 10
+
+# Number of items per chunk of a ChunkedList
+CHUNK_SIZE = 256
+
 
 def _hash(input: str):
     """
@@ -23,11 +44,13 @@ def _hash(input: str):
     return hex_dig
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """
     Represents a message in the chatArena environment.
 
+    Messages are slotted: they carry no per-instance __dict__, which keeps large pools and archived games compact.
+
     Attributes:
         agent_name (str): Name of the agent who sent the message.
         content (str): Content of the message.
@@ -49,18 +72,384 @@ class Message:
     visible_to: Union[str, List[str]] = "all"
     msg_type: str = "text"
     logged: bool = False  # Whether the message is logged in the database
+    _msg_hash: str = field(default=None, init=False, repr=False, compare=False)
 
-    def __post_init__(self):
-        # print("post init!")
-        self.message_dict = [{"role": self.agent_name, "message": self.content}]
-        # print("self.message_dict:", self.message_dict)
+    @property
+    def message_dict(self) -> List[Dict[str, str]]:
+        """The message in the Cohere chat history format, built when it is needed."""
+        return [{"role": self.agent_name, "message": self.content}]
 
     @property
-    def msg_hash(self):
-        # Generate a unique message id given the content, timestamp and role
-        return _hash(
-            f"agent: {self.agent_name}\ncontent: {self.content}\ntimestamp: {str(self.timestamp)}\nturn: {self.turn}\nmsg_type: {self.msg_type}"
+    def msg_hash(self) -> str:
+        """
+        The content-addressed id of the message.
+
+        It is computed on the first access and then stored, so the messages whose hash is never read (e.g. archived
+        games loaded for analysis) do not hold one.
+        """
+        if self._msg_hash is None:
+            # Generate a unique message id given the content, timestamp and role
+            self._msg_hash = _hash(
+                f"agent: {self.agent_name}\ncontent: {self.content}\ntimestamp: {str(self.timestamp)}\nturn: {self.turn}\nmsg_type: {self.msg_type}"
+            )
+        return self._msg_hash
+
+
+def _close_segment(file, path):
+    """Close and delete a segment file."""
+    file.close()
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpilledMessageList(Sequence):
+    """
+    A list of messages whose older turns are spilled to disk.
+
+    The messages of the last `hot_turns` turns stay in memory. Older messages are appended as JSON lines to a
+    segment file, which is only ever appended to and is read back through a memory map. Reading a spilled message
+    returns a new Message object, so changes made to it (e.g. setting `logged`) are not kept.
+
+    Spilling moves messages from the hot list to the segment, and can remap the segment. A list that is read from
+    other threads while it is appended to (see ConcurrentMessagePool) is given the lock of its writer, which the
+    appends and the reads then hold.
+    """
+
+    def __init__(self, spill_dir: str = None, hot_turns: int = DEFAULT_HOT_TURNS, lock=None):
+        fd, self.path = tempfile.mkstemp(
+            prefix="chatarena_", suffix=".segment", dir=spill_dir
         )
+        self._file = os.fdopen(fd, "w+b")
+        self._finalizer = weakref.finalize(self, _close_segment, self._file, self.path)
+        self._offsets = array("q", [0])  # Start of each spilled message, then the end of the last one
+        self._map = None
+        self._hot: List[Message] = []
+        self.hot_turns = hot_turns
+        self._lock = contextlib.nullcontext() if lock is None else lock
+
+    @property
+    def num_spilled(self) -> int:
+        """Number of messages stored in the segment file."""
+        return len(self._offsets) - 1
+
+    def __len__(self):
+        return self.num_spilled + len(self._hot)
+
+    def append(self, message: Message):
+        with self._lock:
+            self._hot.append(message)
+
+            # Spill the messages that are older than the hot turns
+            boundary = message.turn - self.hot_turns
+            num_cold = 0
+            while num_cold < len(self._hot) and self._hot[num_cold].turn <= boundary:
+                num_cold += 1
+            if num_cold > 0:
+                self._spill(num_cold)
+
+    def _spill(self, num_messages: int):
+        """Append the oldest hot messages to the segment file."""
+        data = bytearray()
+        end = self._offsets[-1]
+        for message in self._hot[:num_messages]:
+            line = json.dumps(
+                {
+                    "agent_name": message.agent_name,
+                    "content": message.content,
+                    "turn": message.turn,
+                    "word": message.word,
+                    "timestamp": message.timestamp,
+                    "visible_to": message.visible_to,
+                    "msg_type": message.msg_type,
+                    "logged": message.logged,
+                }
+            ).encode()
+            data += line + b"\n"
+            end += len(line) + 1
+            self._offsets.append(end)
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        self._file.flush()
+        del self._hot[:num_messages]
+
+    def _load(self, idx: int) -> Message:
+        """Read a spilled message back from the segment file."""
+        end = self._offsets[idx + 1]
+        if self._map is None or len(self._map) < end:
+            # The segment grew since it was mapped
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return Message(**json.loads(self._map[self._offsets[idx] : end]))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        with self._lock:
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError("message index out of range")
+            if key < self.num_spilled:
+                return self._load(key)
+            return self._hot[key - self.num_spilled]
+
+    def close(self):
+        """Delete the segment file."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._finalizer()
+
+
+class ChunkedList(Sequence):
+    """
+    An append-only list stored in fixed-size chunks, so that copies share their items.
+
+    Full chunks are never modified again, so a copy shares them with the original and only copies the chunk
+    directory and the last, partially filled chunk. Appends then allocate on each side independently.
+    """
+
+    __slots__ = ("_chunks", "_len")
+
+    def __init__(self, items=()):
+        items = list(items)
+        self._chunks: List[list] = [
+            items[i : i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)
+        ]
+        self._len = len(items)
+
+    def __len__(self):
+        return self._len
+
+    def append(self, item):
+        if self._len % CHUNK_SIZE == 0:
+            self._chunks.append([item])
+        else:
+            self._chunks[-1].append(item)
+        self._len += 1
+
+    def copy(self) -> "ChunkedList":
+        """Copy the list, sharing the full chunks."""
+        copy = ChunkedList()
+        copy._chunks = self._chunks[:]
+        if self._len % CHUNK_SIZE:
+            copy._chunks[-1] = copy._chunks[-1][:]
+        copy._len = self._len
+        return copy
+
+    def __iter__(self):
+        return chain.from_iterable(self._chunks)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._len)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            items = []
+            while start < stop:
+                chunk_idx, offset = divmod(start, CHUNK_SIZE)
+                size = min(stop - start, CHUNK_SIZE - offset)
+                items += self._chunks[chunk_idx][offset : offset + size]
+                start += size
+            return items
+        if key < 0:
+            key += self._len
+        if not 0 <= key < self._len:
+            raise IndexError("list index out of range")
+        return self._chunks[key // CHUNK_SIZE][key % CHUNK_SIZE]
+
+
+def _search_backwards(messages: Sequence, msg_hash: str) -> int:
+    """Get the index of the last message with a given hash, or -1, by reading the messages from the end."""
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].msg_hash == msg_hash:
+            return i
+    return -1
+
+
+def find_message(messages: Sequence, msg_hash: str) -> int:
+    """
+    Get the index of the last message with a given hash in a sequence of messages.
+
+    Views of a MessagePool look the hash up in the index of the pool (see MessageView.find_hash), other sequences
+    are searched backwards.
+
+    Parameters:
+        messages (Sequence): The messages, e.g. an observation.
+        msg_hash (str): The hash of the message (see Message.msg_hash).
+
+    Returns:
+        int: The index of the message in the sequence, or -1 if no message has this hash.
+    """
+    if isinstance(messages, MessageView):
+        return messages.find_hash(msg_hash)
+    return _search_backwards(messages, msg_hash)
+
+
+class HashIndex:
+    """
+    The positions of the messages of a pool by hash, to find a message with a dictionary lookup.
+
+    The index is built lazily: the hashes of the messages appended since the last lookup are read (see
+    Message.msg_hash) on the next lookup, so the pools that are never searched do not compute them.
+    The positions of the messages in the container of a pool do not change when a new epoch is opened or messages
+    are spilled, and a reset gives the pool a new container with a new index.
+
+    The forks of a pool share the dictionary of its index (see fork), so forking does not copy it. Each fork adds
+    the positions of its own messages to it, so a position read from the dictionary is checked against the
+    messages of the fork before it is returned.
+    """
+
+    __slots__ = ("messages", "_positions", "_num_indexed", "_has_duplicates")
+
+    def __init__(self, messages, positions: Dict[str, int] = None, num_indexed: int = 0):
+        self.messages = messages  # The container of the pool
+        self._positions = {} if positions is None else positions  # Hash -> position of its last message
+        self._num_indexed = num_indexed  # Number of messages whose positions are in the dictionary
+        self._has_duplicates = False  # Whether several messages of the container have the same hash
+
+    def fork(self, messages) -> "HashIndex":
+        """Create the index of a fork of the pool, whose container starts with the same messages."""
+        forked = HashIndex(messages, self._positions, self._num_indexed)
+        forked._has_duplicates = self._has_duplicates
+        return forked
+
+    @property
+    def has_duplicates(self) -> bool:
+        """Whether several indexed messages have the same hash, in which case find returns the last of them."""
+        return self._has_duplicates
+
+    def _holds(self, position: int, msg_hash: str) -> bool:
+        return position < len(self.messages) and self.messages[position].msg_hash == msg_hash
+
+    def find(self, msg_hash: str) -> Union[int, None]:
+        """
+        Get the position in the container of the last message with a given hash.
+
+        Returns:
+            Union[int, None]: The position, -1 if no message has this hash, or None if the dictionary holds the
+                position of a message of another fork, in which case the messages must be searched.
+        """
+        for position in range(self._num_indexed, len(self.messages)):
+            message_hash = self.messages[position].msg_hash
+            previous = self._positions.get(message_hash)
+            if previous is not None and previous != position and self._holds(previous, message_hash):
+                self._has_duplicates = True
+            self._positions[message_hash] = position
+            self._num_indexed = position + 1
+
+        position = self._positions.get(msg_hash)
+        if position is None:
+            return -1
+        return position if self._holds(position, msg_hash) else None
+
+
+class MessageView(Sequence):
+    """
+    A read-only view of messages of a MessagePool, which does not copy them.
+
+    The view shows `messages[positions[i]]` for i in [start, stop), or `messages[i]` without positions.
+    The containers of a pool are only ever appended to (a reset replaces them), so a view keeps showing the same
+    messages as the pool grows or is reset. Slicing a view returns another view; views compare equal to lists.
+    """
+
+    __slots__ = ("_messages", "_positions", "_start", "_stop", "_hash_index")
+
+    def __init__(
+        self, messages, positions=None, start: int = 0, stop: int = None, hash_index: HashIndex = None
+    ):
+        self._messages = messages
+        self._positions = positions
+        self._start = start
+        self._stop = len(messages if positions is None else positions) if stop is None else stop
+        self._hash_index = hash_index
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            stop = max(start, stop)
+            return MessageView(
+                self._messages,
+                self._positions,
+                self._start + start,
+                self._start + stop,
+                self._hash_index,
+            )
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("message index out of range")
+        if self._positions is None:
+            return self._messages[self._start + key]
+        return self._messages[self._positions[self._start + key]]
+
+    def __iter__(self):
+        if self._positions is None:
+            if isinstance(self._messages, list):
+                return islice(self._messages, self._start, self._stop)
+            return map(self._messages.__getitem__, range(self._start, self._stop))
+        return map(
+            self._messages.__getitem__, islice(self._positions, self._start, self._stop)
+        )
+
+    def _view_index(self, position: int) -> Union[int, None]:
+        """Get the index in the view of the message at a position of the container, or None if it is not shown."""
+        if self._positions is None:
+            return position - self._start if self._start <= position < self._stop else None
+        i = bisect_left(self._positions, position, self._start, self._stop)
+        if i < self._stop and self._positions[i] == position:
+            return i - self._start
+        return None
+
+    def find_hash(self, msg_hash: str) -> int:
+        """
+        Get the index of the last message of the view with a given hash.
+
+        The hash is looked up in the index of the pool (see HashIndex). The view is only searched backwards when the
+        index cannot tell, e.g. when the last message with the hash is not shown by the view but an earlier one may be.
+
+        Parameters:
+            msg_hash (str): The hash of the message (see Message.msg_hash).
+
+        Returns:
+            int: The index of the message in the view, or -1 if no message of the view has this hash.
+        """
+        if self._hash_index is not None:
+            position = self._hash_index.find(msg_hash)
+            if position == -1:
+                return -1
+            if position is not None:
+                i = self._view_index(position)
+                if i is not None:
+                    return i
+                if not self._hash_index.has_duplicates:
+                    return -1
+        return _search_backwards(self, msg_hash)
+
+    def __eq__(self, other):
+        if not isinstance(other, (MessageView, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return f"MessageView({list(self)!r})"
 
 
 class MessagePool:
@@ -70,19 +459,105 @@ class MessagePool:
     The pool is essentially a list of messages, and it allows a unified treatment of the visibility of the messages.
     It supports two configurations for step definition: multiple players can act in the same turn (like in rock-paper-scissors).
     Agents can only see the messages that 1) were sent before the current turn, and 2) are visible to the current role.
+
+    Visibility is indexed as messages are appended: every agent name is interned to a bit, every message stores
+    a bitmask of its receivers, and each agent keeps the (sorted) list of indices of the messages it can see.
+    Looking up the visible messages is then a binary search on the turn boundary, and the result is a MessageView
+    over the index: reads do not copy the messages.
+
+    Readers that only need the messages added since their last read use get_new_messages with a cursor.
+    Readers that only know the last message they read find it by its hash in the views (see MessageView.find_hash).
+    Cursors are positions in the whole history of the pool, so they stay valid across a reset.
+    The contents of the moderator and system messages are interned (see sys.intern), so that the games of a process
+    share one copy of each prompt. Interned strings are freed once no message refers to them anymore.
+
+    A pool can be forked (see fork) to explore several continuations of a game: the forks share the history
+    instead of copying it.
+
+    The history is divided into epochs. Opening a new epoch (see new_epoch) hides the previous messages from the
+    reads, like a reset, but keeps them in the pool: get_history reads all the epochs as one view, without copying.
     """
 
-    def __init__(self):
-        """Initialize the MessagePool with a unique conversation ID."""
+    def __init__(self, spill_dir: str = None, hot_turns: int = DEFAULT_HOT_TURNS):
+        """
+        Initialize the MessagePool with a unique conversation ID.
+
+        Parameters:
+            spill_dir (str): If specified, the messages older than `hot_turns` turns are spilled to a segment file
+                in this directory (see SpilledMessageList), so that long conversations use a flat amount of memory.
+            hot_turns (int): Number of most recent turns kept in memory when spilling.
+        """
         self.conversation_id = str(uuid1())
+        self.spill_dir = spill_dir
+        self.hot_turns = hot_turns
         self._messages: List[Message] = (
-            []
-        )  # TODO: for the sake of thread safety, use a queue instead
+            self._new_message_list()
+        )  # Not thread-safe: share a ConcurrentMessagePool between threads instead
+        self._hash_index = HashIndex(self._messages)  # See MessageView.find_hash
         self._last_message_idx = 0
+        self._offset = 0  # Number of messages discarded by the previous resets
+        self._agent_bits: Dict[str, int] = {}  # Interned agent names -> visibility bit
+        self._reset_index()
+
+    def _reset_index(self):
+        """Clear the visibility and turn indices."""
+        self._masks: List[int] = []  # Visibility bitmask of each message
+        self._turns: List[int] = []  # Turn of each message
+        self._agent_index: Dict[str, List[int]] = {}  # Agent name -> visible message indices
+        self._turns_sorted = True  # Whether the turns were appended in order
+        self._epoch_start = 0  # Index of the first message of the current epoch
+
+    def _new_message_list(self) -> List[Message]:
+        """Create the container of the messages: a list, or a SpilledMessageList in spill mode."""
+        if self.spill_dir is None:
+            return []
+        return SpilledMessageList(self.spill_dir, self.hot_turns)
 
     def reset(self):
         """Clear the message pool."""
-        self._messages = []
+        self._offset += len(self._messages)
+        # A spilled segment is deleted once the views that read it are gone
+        self._messages = self._new_message_list()
+        self._hash_index = HashIndex(self._messages)
+        self._reset_index()
+
+    def new_epoch(self):
+        """
+        Open a new epoch: the reads only return the messages appended from now on, as after a reset.
+
+        The previous messages are kept (see get_history), and the cursors stay valid.
+        """
+        self._epoch_start = len(self._messages)
+
+    def _agent_bit(self, agent_name: str) -> int:
+        """Intern an agent name and return its visibility bit."""
+        bit = self._agent_bits.get(agent_name)
+        if bit is None:
+            bit = 1 << len(self._agent_bits)
+            self._agent_bits[agent_name] = bit
+        return bit
+
+    def _visibility_mask(self, visible_to: Union[str, List[str]]) -> int:
+        """Convert the visible_to field of a message into a bitmask over the interned agent names."""
+        if visible_to == "all":
+            return VISIBLE_TO_ALL
+        if isinstance(visible_to, str):
+            visible_to = [visible_to]
+        mask = 0
+        for agent_name in visible_to:
+            mask |= self._agent_bit(agent_name)
+        return mask
+
+    def _get_agent_index(self, agent_name: str) -> List[int]:
+        """Get the indices of the messages visible to an agent, building them on the first lookup."""
+        index = self._agent_index.get(agent_name)
+        if index is None:
+            bit = self._agent_bit(agent_name)
+            index = [i for i, mask in enumerate(self._masks) if mask & bit]
+            if isinstance(self._masks, ChunkedList):
+                index = ChunkedList(index)
+            self._agent_index[agent_name] = index
+        return index
 
     def append_message(self, message: Message):
         """
@@ -91,7 +566,127 @@ class MessagePool:
         Parameters:
             message (Message): The message to be added to the pool.
         """
+        idx = len(self._messages)
+        mask = self._visibility_mask(message.visible_to)
+        if message.agent_name in (MODERATOR_NAME, SYSTEM_NAME):
+            message.content = sys.intern(message.content)
+        if self._turns and message.turn < self._turns[-1]:
+            self._turns_sorted = False
+
         self._messages.append(message)
+        self._masks.append(mask)
+        self._turns.append(message.turn)
+        for agent_name, index in self._agent_index.items():
+            if mask & self._agent_bits[agent_name]:
+                index.append(idx)
+
+    def _share_storage(self):
+        """Move the messages and their indices to ChunkedLists, which forks can share."""
+        if isinstance(self._messages, ChunkedList):
+            return
+        self._messages = ChunkedList(self._messages)
+        self._hash_index.messages = self._messages  # The positions of the messages are the same
+        self._masks = ChunkedList(self._masks)
+        self._turns = ChunkedList(self._turns)
+        self._agent_index = {
+            agent_name: ChunkedList(index)
+            for agent_name, index in self._agent_index.items()
+        }
+
+    def fork(self) -> "MessagePool":
+        """
+        Fork the pool: the fork starts with the same messages, then the two pools are independent.
+
+        The history is shared rather than copied. The first fork moves the pool to chunked storage
+        (see ChunkedList); from then on, forking only copies the chunk directories and the last, partially filled
+        chunks, whatever the length of the history. Appending to or resetting one pool does not affect the other.
+        The Message objects themselves are shared, so changes made to them (e.g. setting `logged`) are seen by both.
+
+        Returns:
+            MessagePool: The fork, with a new conversation ID.
+        """
+        if isinstance(self._messages, SpilledMessageList):
+            raise ValueError("Cannot fork a MessagePool that spills to disk")
+        self._share_storage()
+
+        forked = object.__new__(type(self))
+        forked.conversation_id = str(uuid1())
+        forked.spill_dir = self.spill_dir
+        forked.hot_turns = self.hot_turns
+        forked._messages = self._messages.copy()
+        forked._hash_index = self._hash_index.fork(forked._messages)
+        forked._last_message_idx = self._last_message_idx
+        forked._offset = self._offset
+        forked._agent_bits = dict(self._agent_bits)
+        forked._masks = self._masks.copy()
+        forked._turns = self._turns.copy()
+        forked._agent_index = {
+            agent_name: index.copy() for agent_name, index in self._agent_index.items()
+        }
+        forked._turns_sorted = self._turns_sorted
+        forked._epoch_start = self._epoch_start
+        return forked
+
+    def snapshot(self) -> "MessagePool":
+        """
+        Take a snapshot of the pool, to fork the game from this point later.
+
+        The snapshot is a fork that is kept aside: forking it again shares the history with every branch.
+        """
+        return self.fork()
+
+    def get_state(self, start: int = 0) -> Dict:
+        """
+        The state of the pool, to checkpoint a game (see Arena.checkpoint).
+
+        Only the messages are saved: the indices are rebuilt when the state is restored.
+
+        Parameters:
+            start (int): The position, since the last reset, of the first message to save. A checkpoint that
+                already saved the previous messages only saves the messages appended since.
+
+        Returns:
+            Dict: The state. set_state restores a state that holds all the messages, i.e. with a `start` of 0.
+        """
+        return {
+            "conversation_id": self.conversation_id,
+            "spill_dir": self.spill_dir,
+            "hot_turns": self.hot_turns,
+            "start": start,
+            "messages": [self._messages[i] for i in range(start, len(self._messages))],
+            "last_message_idx": self._last_message_idx,
+            "offset": self._offset,
+            "epoch_start": self._epoch_start,
+        }
+
+    def set_state(self, state: Dict):
+        """
+        Restore a state returned by get_state, replacing the messages of the pool.
+
+        Parameters:
+            state (Dict): The state of the pool, with all its messages.
+        """
+        if state["start"] != 0:
+            raise ValueError("The state of the pool does not hold its first messages")
+        self.conversation_id = state["conversation_id"]
+        self.spill_dir = state["spill_dir"]
+        self.hot_turns = state["hot_turns"]
+        self._messages = self._new_message_list()
+        self._hash_index = HashIndex(self._messages)
+        self._reset_index()
+        self._last_message_idx = state["last_message_idx"]
+        # Keep the cursors of the readers valid
+        self._offset = state["offset"]
+        for message in state["messages"]:
+            self.append_message(message)
+        self._epoch_start = state["epoch_start"]
+
+    def __getstate__(self) -> Dict:
+        return self.get_state()
+
+    def __setstate__(self, state: Dict):
+        MessagePool.__init__(self, spill_dir=state["spill_dir"], hot_turns=state["hot_turns"])
+        self.set_state(state)
 
     def print(self):
         """Print all the messages in the pool."""
@@ -106,7 +701,7 @@ class MessagePool:
         Returns:
             int: The turn of the last message.
         """
-        if len(self._messages) == 0:
+        if len(self._messages) == self._epoch_start:
             return 0
         else:
             return self._messages[-1].turn
@@ -119,21 +714,30 @@ class MessagePool:
         Returns:
             Message: The last message.
         """
-        if len(self._messages) == 0:
+        if len(self._messages) == self._epoch_start:
             return None
         else:
             return self._messages[-1]
 
-    def get_all_messages(self) -> List[Message]:
+    def get_all_messages(self) -> MessageView:
+        """
+        Get all the messages of the current epoch.
+
+        Returns:
+            MessageView: A view of all the messages, which does not include the messages appended later.
+        """
+        return MessageView(self._messages, start=self._epoch_start, hash_index=self._hash_index)
+
+    def get_history(self) -> MessageView:
         """
-        Get all the messages in the pool.
+        Get all the messages of all the epochs since the last reset.
 
         Returns:
-            List[Message]: A list of all messages.
+            MessageView: A view of the messages, which does not include the messages appended later.
         """
-        return self._messages
+        return MessageView(self._messages, hash_index=self._hash_index)
 
-    def get_visible_messages(self, agent_name, turn: int) -> List[Message]:
+    def get_visible_messages(self, agent_name, turn: int) -> MessageView:
         """
         Get all the messages that are visible to a given agent before a specified turn.
 
@@ -142,18 +746,155 @@ class MessagePool:
             turn (int): The specified turn.
 
         Returns:
-            List[Message]: A list of visible messages.
+            MessageView: A view of the visible messages.
+        """
+
+        if not self._turns_sorted:
+            # Out-of-order turns: fall back to scanning the whole epoch
+            bit = VISIBLE_TO_ALL if agent_name == MODERATOR_NAME else self._agent_bit(agent_name)
+            positions = [
+                i
+                for i in range(self._epoch_start, len(self._messages))
+                if self._turns[i] <= turn and self._masks[i] & bit
+            ]
+            return MessageView(self._messages, positions, hash_index=self._hash_index)
+
+        if agent_name == MODERATOR_NAME:  # The moderator sees every message
+            end = max(bisect_right(self._turns, turn), self._epoch_start)
+            return MessageView(
+                self._messages, start=self._epoch_start, stop=end, hash_index=self._hash_index
+            )
+
+        index = self._get_agent_index(agent_name)
+        start = bisect_left(index, self._epoch_start)
+        end = max(bisect_right(index, turn, key=self._turns.__getitem__), start)
+        return MessageView(self._messages, index, start, end, self._hash_index)
+
+    def get_new_messages(
+        self, agent_name: str = None, cursor: int = 0, turn: int = None
+    ) -> Tuple[MessageView, int]:
         """
+        Get the messages visible to a given agent that were added to the pool since a cursor.
+
+        Parameters:
+            agent_name (str): The name of the agent. Defaults to None, which returns the messages visible to anyone.
+            cursor (int): The cursor returned by the previous call, or 0 to read from the beginning.
+            turn (int): If specified, only return the messages sent before this turn.
+
+        Returns:
+            Tuple[MessageView, int]: A view of the new messages, and the cursor to pass to the next call.
+        """
+        start = min(max(cursor - self._offset, self._epoch_start), len(self._messages))
+
+        if not self._turns_sorted:
+            # Out-of-order turns: the turn boundary is not a position, filter the new messages one by one
+            bit = VISIBLE_TO_ALL if agent_name in (None, MODERATOR_NAME) else self._agent_bit(agent_name)
+            end = len(self._messages)
+            positions = [
+                i
+                for i in range(start, end)
+                if (turn is None or self._turns[i] <= turn) and self._masks[i] & bit
+            ]
+            return MessageView(self._messages, positions, hash_index=self._hash_index), self._offset + end
+
+        if turn is None:
+            end = len(self._messages)
+        else:
+            end = max(bisect_right(self._turns, turn), start)
+
+        if agent_name is None or agent_name == MODERATOR_NAME:
+            messages = MessageView(self._messages, start=start, stop=end, hash_index=self._hash_index)
+        else:
+            index = self._get_agent_index(agent_name)
+            messages = MessageView(
+                self._messages,
+                index,
+                bisect_left(index, start),
+                bisect_left(index, end),
+                self._hash_index,
+            )
+        return messages, self._offset + end
+
+
+class ConcurrentMessagePool(MessagePool):
+    """
+    A MessagePool that can be shared by several threads.
+
+    Several producers (e.g. agents whose backend calls run on worker threads) can append messages as their
+    results arrive, while observers read the pool. Every operation holds a lock only for the short index update
+    or lookup, so a message and its index entries are appended atomically, all threads see the same order of
+    messages, and reads always see a consistent prefix of the pool.
+    Reads return views of the messages appended so far, which later appends do not modify. In spill mode, the
+    views read the spilled messages under the lock of the pool, since an append can spill the messages they show.
+    """
+
+    def __init__(self, **kwargs):
+        self._lock = threading.RLock()
+        super().__init__(**kwargs)
+
+    def _new_message_list(self) -> List[Message]:
+        if self.spill_dir is None:
+            return []
+        return SpilledMessageList(self.spill_dir, self.hot_turns, lock=self._lock)
+
+    def reset(self):
+        with self._lock:
+            super().reset()
+
+    def append_message(self, message: Message):
+        with self._lock:
+            super().append_message(message)
+
+    def get_state(self, start: int = 0) -> Dict:
+        with self._lock:
+            return super().get_state(start)
+
+    def set_state(self, state: Dict):
+        with self._lock:
+            super().set_state(state)
+
+    def __setstate__(self, state: Dict):
+        self._lock = threading.RLock()
+        super().__setstate__(state)
+
+    def fork(self) -> "ConcurrentMessagePool":
+        with self._lock:
+            forked = super().fork()
+        forked._lock = threading.RLock()
+        return forked
+
+    def print(self):
+        for message in self.get_all_messages():
+            print(f"[{message.agent_name}->{message.visible_to}]: {message.content}")
+
+    @property
+    def last_turn(self):
+        with self._lock:
+            return super().last_turn
+
+    @property
+    def last_message(self):
+        with self._lock:
+            return super().last_message
+
+    def new_epoch(self):
+        with self._lock:
+            super().new_epoch()
+
+    def get_all_messages(self) -> MessageView:
+        with self._lock:
+            return super().get_all_messages()
+
+    def get_history(self) -> MessageView:
+        with self._lock:
+            return super().get_history()
 
-        # Get the messages before the current turn
-        prev_messages = [message for message in self._messages if message.turn <= turn]
+    def get_visible_messages(self, agent_name, turn: int) -> MessageView:
+        with self._lock:
+            return super().get_visible_messages(agent_name, turn)
 
-        visible_messages = []
-        for message in prev_messages:
-            if (
-                message.visible_to == "all"
-                or agent_name in message.visible_to
-                or agent_name == "Moderator"
-            ):
-                visible_messages.append(message)
-        return visible_messages
+    def get_new_messages(
+        self, agent_name: str = None, cursor: int = 0, turn: int = None
+    ) -> Tuple[MessageView, int]:
+        with self._lock:
+            return super().get_new_messages(agent_name, cursor, turn)
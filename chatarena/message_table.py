@@ -0,0 +1,360 @@
+"""
+Columnar message store for offline analysis.
+
+A MessageTable holds the messages of many games as NumPy columns: agent names, roles, contents and the other
+strings are interned once and stored as integer codes, turns and timestamps are integer columns, and the receivers
+of each message are a bitmask over the interned agent names. Queries are boolean masks over the columns, so
+filtering and aggregating thousands of games does not build a Python object per message.
+"""
+import json
+import os
+from typing import Dict, Iterable, List
+
+from .message import Message, MessagePool
+
+try:
+    import numpy as np
+except ImportError:
+    is_numpy_available = False
+else:
+    is_numpy_available = True
+
+# Number of distinct agent names that fit in the visibility bitmask column
+MAX_AGENTS = 64
+# Code of a missing string (e.g. a message without a word, or the role of the moderator)
+MISSING = -1
+
+
+class StringTable:
+    """Interns strings to integer codes."""
+
+    def __init__(self, strings: Iterable[str] = ()):
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for string in strings:
+            self.code(string)
+
+    def __len__(self):
+        return len(self.strings)
+
+    def code(self, string: str) -> int:
+        """Get the code of a string, interning it if needed. None is coded as MISSING."""
+        if string is None:
+            return MISSING
+        code = self._codes.get(string)
+        if code is None:
+            code = len(self.strings)
+            self._codes[string] = code
+            self.strings.append(string)
+        return code
+
+    def lookup(self, string: str) -> int:
+        """Get the code of a string without interning it. Unknown strings are coded as MISSING."""
+        return self._codes.get(string, MISSING)
+
+    def decode(self, code: int) -> str:
+        return None if code == MISSING else self.strings[code]
+
+
+class MessageTable:
+    """
+    A columnar (NumPy-backed) table of messages from one or many games.
+
+    Columns:
+        game (int32): Index of the game in `games`.
+        agent (int32): Code of the agent name in `agent_names`.
+        role (int32): Code of the role of the agent in `roles`, MISSING for the moderator.
+        content (int32): Code of the content in `contents`.
+        word (int32): Code of the word in `words`, MISSING if the message has none.
+        msg_type (int32): Code of the message type in `msg_types`.
+        turn (int64): The turn at which the message was sent.
+        timestamp (int64): Wall time at which the message was sent.
+        visibility (uint64): Bitmask of the receivers over `agent_names`, all bits set for 'all'.
+        phase (int32): Code of the phase in `phases`, MISSING until label_phases is called.
+
+    Each entry of `games` holds the game-level data (disposition, metrics, players and prompt mode).
+    """
+
+    def __init__(self):
+        assert is_numpy_available, "numpy is not installed"
+        self.agent_names = StringTable()
+        self.roles = StringTable()
+        self.contents = StringTable()
+        self.words = StringTable()
+        self.msg_types = StringTable()
+        self.prompt_modes = StringTable()
+        self.phases = StringTable()
+        self.games: List[Dict] = []
+
+        self._rows: Dict[str, list] = {name: [] for name in self._column_dtypes()}
+        self._game_prompt_mode: list = []
+        self._build()
+
+    @staticmethod
+    def _column_dtypes() -> Dict[str, str]:
+        return {
+            "game": "int32",
+            "agent": "int32",
+            "role": "int32",
+            "content": "int32",
+            "word": "int32",
+            "msg_type": "int32",
+            "turn": "int64",
+            "timestamp": "int64",
+            "visibility": "uint64",
+        }
+
+    def _build(self):
+        """Convert the buffered rows into the NumPy columns."""
+        for name, dtype in self._column_dtypes().items():
+            setattr(self, name, np.array(self._rows[name], dtype=dtype))
+        self.phase = np.full(len(self.game), MISSING, dtype="int32")
+        self.game_prompt_mode = np.array(self._game_prompt_mode, dtype="int32")
+        self._content_lengths = None
+
+    def __len__(self):
+        return len(self.game)
+
+    def _visibility_mask(self, visible_to) -> int:
+        if visible_to == "all":
+            return (1 << MAX_AGENTS) - 1
+        if isinstance(visible_to, str):
+            visible_to = [visible_to]
+        mask = 0
+        for agent_name in visible_to:
+            mask |= 1 << self.agent_names.code(agent_name)
+        return mask
+
+    def _add_game(
+        self,
+        messages: Iterable,
+        disposition: Dict = None,
+        metrics: Dict = None,
+        players: List[Dict] = None,
+        prompt_mode: str = None,
+    ):
+        """Buffer the rows of one game. `messages` are Message objects or the dicts of a saved chat."""
+        game_idx = len(self.games)
+        self.games.append(
+            {
+                "disposition": disposition or {},
+                "metrics": metrics or {},
+                "players": players or [],
+                "prompt_mode": prompt_mode,
+            }
+        )
+        self._game_prompt_mode.append(self.prompt_modes.code(prompt_mode))
+        name_to_role = {player["name"]: player.get("role") for player in players or []}
+
+        rows = self._rows
+        for message in messages:
+            if not isinstance(message, dict):
+                message = {
+                    "agent_name": message.agent_name,
+                    "content": message.content,
+                    "turn": message.turn,
+                    "word": message.word,
+                    "timestamp": message.timestamp,
+                    "visible_to": message.visible_to,
+                    "msg_type": message.msg_type,
+                }
+            agent_name = message["agent_name"]
+            rows["game"].append(game_idx)
+            rows["agent"].append(self.agent_names.code(agent_name))
+            rows["role"].append(self.roles.code(name_to_role.get(agent_name)))
+            rows["content"].append(self.contents.code(message["content"]))
+            rows["word"].append(self.words.code(message.get("word")))
+            rows["msg_type"].append(self.msg_types.code(message.get("msg_type", "text")))
+            rows["turn"].append(message["turn"])
+            rows["timestamp"].append(int(message["timestamp"]))
+            rows["visibility"].append(
+                self._visibility_mask(message.get("visible_to", "all"))
+            )
+
+        if len(self.agent_names) > MAX_AGENTS:
+            raise ValueError(
+                f"MessageTable supports at most {MAX_AGENTS} distinct agent names"
+            )
+
+    @classmethod
+    def from_pool(cls, pool: MessagePool, **game_info) -> "MessageTable":
+        """Create a table holding the messages of a MessagePool as a single game."""
+        table = cls()
+        table._add_game(pool.get_all_messages(), **game_info)
+        table._build()
+        return table
+
+    @classmethod
+    def from_chats(cls, paths: Iterable[str]) -> "MessageTable":
+        """
+        Create a table from chats saved with Arena.save_chat.
+
+        The prompt mode of a game is the prompt_version of its disposition, or else the name of its folder
+        (the experiment scripts save the chats in chat_history/<prompt_mode>/). The contents saved as a prompt ID
+        are read from the prompts of the chat.
+        """
+        table = cls()
+        for path in paths:
+            with open(path, "r") as fp:
+                chat = json.load(fp)
+            prompts = chat.get("prompts")
+            if prompts is not None:
+                chat["messages"] = [
+                    dict(message, content=prompts[message["prompt_id"]]) if "prompt_id" in message else message
+                    for message in chat["messages"]
+                ]
+            disposition = chat.get("disposition", {})
+            prompt_mode = disposition.get("prompt_version") or os.path.basename(
+                os.path.dirname(os.path.abspath(path))
+            )
+            table._add_game(
+                chat["messages"],
+                disposition=disposition,
+                metrics=chat.get("metrics"),
+                players=chat.get("players"),
+                prompt_mode=prompt_mode,
+            )
+        table._build()
+        return table
+
+    def get_message(self, row: int) -> Message:
+        """Rebuild the Message of a row."""
+        visibility = int(self.visibility[row])
+        if visibility == (1 << MAX_AGENTS) - 1:
+            visible_to = "all"
+        else:
+            visible_to = [
+                name
+                for code, name in enumerate(self.agent_names.strings)
+                if visibility >> code & 1
+            ]
+        return Message(
+            agent_name=self.agent_names.decode(self.agent[row]),
+            content=self.contents.decode(self.content[row]),
+            turn=int(self.turn[row]),
+            word=self.words.decode(self.word[row]),
+            timestamp=int(self.timestamp[row]),
+            visible_to=visible_to,
+            msg_type=self.msg_types.decode(self.msg_type[row]),
+        )
+
+    def to_pool(self, game: int = 0) -> MessagePool:
+        """Rebuild the MessagePool of a game."""
+        pool = MessagePool()
+        for row in np.flatnonzero(self.game == game):
+            pool.append_message(self.get_message(row))
+        return pool
+
+    @property
+    def content_length(self) -> "np.ndarray":
+        """Number of characters of the content of each message."""
+        if self._content_lengths is None:
+            lengths = np.fromiter(
+                (len(content) for content in self.contents.strings),
+                dtype="int64",
+                count=len(self.contents),
+            )
+            self._content_lengths = lengths[self.content]
+        return self._content_lengths
+
+    @property
+    def prompt_mode(self) -> "np.ndarray":
+        """Code of the prompt mode of the game of each message."""
+        return self.game_prompt_mode[self.game]
+
+    def label_phases(self, markers: Dict[str, str]):
+        """
+        Label the phase of every message from the moderator announcements.
+
+        Each message takes the phase of the latest announcement of its game. Messages before the first
+        announcement of their game keep the MISSING phase. The markers are only matched against the distinct
+        contents, so labelling does not scan the messages in Python.
+
+        Parameters:
+            markers (Dict[str, str]): Phase name -> text contained in the moderator message that opens the phase.
+        """
+        # Phase opened by each distinct content, if any
+        content_phase = np.full(len(self.contents), MISSING, dtype="int32")
+        for phase, marker in markers.items():
+            phase_code = self.phases.code(phase)
+            for code, content in enumerate(self.contents.strings):
+                if marker in content:
+                    content_phase[code] = phase_code
+
+        moderator = self.agent_names.lookup("Moderator")
+        opens_phase = (content_phase[self.content] != MISSING) & (self.agent == moderator)
+        # Forward-fill the row of the latest announcement, without crossing game boundaries
+        rows = np.arange(len(self))
+        game_start = np.r_[True, self.game[1:] != self.game[:-1]] if len(self) else rows.astype(bool)
+        last_marker = np.maximum.accumulate(np.where(opens_phase | game_start, rows, 0))
+        self.phase = np.where(
+            opens_phase[last_marker], content_phase[self.content[last_marker]], MISSING
+        ).astype("int32")
+
+    def where(
+        self,
+        agent: str = None,
+        role: str = None,
+        phase: str = None,
+        prompt_mode: str = None,
+        visible_to: str = None,
+        game: int = None,
+    ) -> "np.ndarray":
+        """
+        Boolean mask of the messages matching all the given criteria.
+
+        Parameters:
+            agent (str): Name of the agent who sent the message.
+            role (str): Role of the agent who sent the message.
+            phase (str): Phase of the message (see label_phases).
+            prompt_mode (str): Prompt mode of the game.
+            visible_to (str): Name of an agent that can see the message.
+            game (int): Index of the game.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if agent is not None:
+            mask &= self.agent == self.agent_names.lookup(agent)
+        if role is not None:
+            mask &= self.role == self.roles.lookup(role)
+        if phase is not None:
+            mask &= self.phase == self.phases.lookup(phase)
+        if prompt_mode is not None:
+            mask &= self.prompt_mode == self.prompt_modes.lookup(prompt_mode)
+        if visible_to is not None:
+            code = self.agent_names.lookup(visible_to)
+            if code == MISSING:
+                mask &= False
+            else:
+                mask &= (self.visibility >> np.uint64(code)) & np.uint64(1) == 1
+        if game is not None:
+            mask &= self.game == game
+        return mask
+
+    def mean_by(self, values: "np.ndarray", by: str, mask: "np.ndarray" = None) -> Dict[str, float]:
+        """
+        Mean of a per-message column for each value of a coded column.
+
+        Parameters:
+            values (np.ndarray): The per-message values, e.g. content_length.
+            by (str): The coded column to group by: agent, role, phase or prompt_mode.
+            mask (np.ndarray): Only aggregate the messages of this boolean mask.
+
+        Returns:
+            Dict[str, float]: Group name -> mean of the values, for the non-empty groups.
+        """
+        codes = getattr(self, by)
+        labels = {
+            "agent": self.agent_names,
+            "role": self.roles,
+            "phase": self.phases,
+            "prompt_mode": self.prompt_modes,
+        }[by]
+        if mask is None:
+            mask = np.ones(len(self), dtype=bool)
+        mask = mask & (codes != MISSING)
+        sums = np.bincount(codes[mask], weights=values[mask], minlength=len(labels))
+        counts = np.bincount(codes[mask], minlength=len(labels))
+        return {
+            labels.strings[code]: float(sums[code] / counts[code])
+            for code in np.flatnonzero(counts)
+        }
@@ -67,6 +67,9 @@ class PettingZooCompatibilityV0(pettingzoo.AECEnv):
         self.rewards = {}
         self.infos = {a: {} for a in self.possible_agents}
 
+        self._cursors = {}  # Agent -> cursor of the messages already observed
+        self._turn_messages = {}  # Agent -> (latest turn, messages of that turn)
+
     @functools.lru_cache(maxsize=None)
     def observation_space(self, agent: AgentID):
         """Observation_space.
@@ -118,6 +121,26 @@ class PettingZooCompatibilityV0(pettingzoo.AECEnv):
         self._env.environment.print()
         pass
 
+    def _get_current_turn_messages(self, agent: AgentID | None = None):
+        """Get the latest turn and its messages visible to an agent, reading only the messages added since the last call.
+
+        Args:
+            agent (Optional[AgentID]): agent, or None for all the messages
+
+        Returns:
+            turn, messages
+        """
+        new_messages, self._cursors[agent] = self._env.environment.get_new_messages(
+            agent, self._cursors.get(agent, 0)
+        )
+        turn, turn_messages = self._turn_messages.get(agent, (0, []))
+        for m in new_messages:
+            if m.turn != turn:
+                turn, turn_messages = m.turn, []
+            turn_messages.append(m)
+        self._turn_messages[agent] = (turn, turn_messages)
+        return turn, list(turn_messages)
+
     def observe(self, agent: AgentID) -> ObsType:
         """Observe.
 
@@ -127,16 +150,8 @@ class PettingZooCompatibilityV0(pettingzoo.AECEnv):
         Returns:
             observation
         """
-        messages = self._env.environment.get_observation(
-            agent
-        )  # this will only return the messages this agent can see
-        if len(messages) > 0:
-            self.current_turn = messages[-1].turn
-        else:
-            self.current_turn = 0
-        new_messages = [
-            m for m in messages if m.turn == self.current_turn
-        ]  # we only send the current timestep messages
+        # this will only return the messages this agent can see, and we only send the current timestep messages
+        self.current_turn, new_messages = self._get_current_turn_messages(agent)
 
         # string observation
         if self.string_observation:
@@ -157,15 +172,8 @@ class PettingZooCompatibilityV0(pettingzoo.AECEnv):
         pass
 
     def _unravel_timestep(self, timestep: chatarena.arena.TimeStep):
-        # get observation
-        messages = timestep.observation
-        if len(messages) > 0:
-            self.current_turn = messages[-1].turn
-        else:
-            self.current_turn = 0
-        new_messages = [
-            m for m in messages if m.turn == self.current_turn
-        ]  # we only send the current timestep messages
+        # get observation (we only send the current timestep messages)
+        self.current_turn, new_messages = self._get_current_turn_messages()
 
         # string observation
         if self.string_observation:
@@ -216,6 +224,8 @@ class PettingZooCompatibilityV0(pettingzoo.AECEnv):
         # reset the chat arena environment
         self.initial_timestep = self._env.reset()
         self.turn = 0
+        self._cursors = {}
+        self._turn_messages = {}
 
         # get the first player
         self.agent_selection = self._env.environment.get_next_player()
@@ -10,6 +10,7 @@ from rich.text import Text
 
 from ..arena import Arena, TooManyInvalidActions
 from ..backends.human import HumanBackendError
+from ..hooks import ArenaHook
 
 ASCII_ART = r"""
 _________  .__               __      _____
@@ -33,6 +34,31 @@ MAX_STEPS = 5
 logging.getLogger().setLevel(logging.ERROR)
 
 
+class MessagePrinter(ArenaHook):
+    """A hook that prints the new messages of the environment after each step."""
+
+    def __init__(self, console: Console, name_to_color: dict):
+        self.console = console
+        self.name_to_color = name_to_color
+        self.cursor = 0  # Cursor of the messages already printed
+
+    def after_env_step(self, arena: Arena, timestep):
+        # The messages that are not yet printed. They are not marked as logged: `logged` is for the database
+        # (see SupabaseDB.save_messages), whose logger may run after the printer
+        messages, self.cursor = arena.environment.get_new_messages(cursor=self.cursor)
+        # Print the new messages
+        for msg in messages:
+            message_text = Text(
+                f"[{msg.agent_name}->{msg.visible_to}]: {msg.content}"
+            )
+            message_text.stylize(
+                f"bold {self.name_to_color[msg.agent_name]}",
+                0,
+                len(f"[{msg.agent_name}->{msg.visible_to}]:"),
+            )
+            self.console.print(message_text)
+
+
 class ArenaCLI:
     """The CLI user interface for ChatArena."""
 
@@ -78,6 +104,17 @@ class ArenaCLI:
 
         console.print("\n========= Arena Start! ==========\n", style="bold green")
 
+        printer = self.arena.add_hook(MessagePrinter(console, name_to_color))
+        try:
+            self._run(timestep, printer, console, max_steps, interactive)
+        finally:
+            self.arena.hooks.remove(printer)
+
+        console.print("\n========= Arena Ended! ==========\n", style="bold red")
+
+    def _run(self, timestep, printer: MessagePrinter, console: Console, max_steps: int, interactive: bool):
+        """Run the steps of the game, the printer hook prints the messages of each step."""
+        env = self.arena.environment
         step = 0
         while not timestep.terminal:
             if interactive:
@@ -114,6 +151,7 @@ class ArenaCLI:
                     break
                 elif command == "reset" or command == "r":
                     timestep = self.arena.reset()
+                    printer.cursor = 0
                     console.print(
                         "\n========= Arena Reset! ==========\n", style="bold green"
                     )
@@ -135,6 +173,7 @@ class ArenaCLI:
                     console.print(f"Invalid command: {command}", style="bold red")
                     continue
 
+            num_steps = self.arena.num_steps
             try:
                 timestep = self.arena.step()
             except HumanBackendError as e:
@@ -151,7 +190,7 @@ class ArenaCLI:
                         style=Style.from_dict({"user_prompt": "ansicyan underline"}),
                     )
                     # If not, the conversation does not stop
-                    timestep = env.step(human_player_name, human_input)
+                    timestep = self.arena.take_action(human_player_name, human_input)
                 else:
                     raise e  # cannot recover from this error in non-interactive mode
             except TooManyInvalidActions as e:
@@ -159,24 +198,7 @@ class ArenaCLI:
                 console.print(f"Too many invalid actions: {e}", style="bold red")
                 break
 
-            # The messages that are not yet logged
-            messages = [msg for msg in env.get_observation() if not msg.logged]
-            # Print the new messages
-            for msg in messages:
-                message_text = Text(
-                    f"[{msg.agent_name}->{msg.visible_to}]: {msg.content}"
-                )
-                message_text.stylize(
-                    f"bold {name_to_color[msg.agent_name]}",
-                    0,
-                    len(f"[{msg.agent_name}->{msg.visible_to}]:"),
-                )
-                console.print(message_text)
-                msg.logged = True
-
-            step += 1
+            step += self.arena.num_steps - num_steps  # A simultaneous step counts one step per player
             if max_steps is not None and step >= max_steps:
                 print("\n========= Maximum number of steps reached. Better luck next time :( ==========\n")
                 break
-
-        console.print("\n========= Arena Ended! ==========\n", style="bold red")
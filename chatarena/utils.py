@@ -1,6 +1,10 @@
+import functools
 import json
+import os
 import re
 
+import yaml
+
 
 def is_json(myjson):
     """
@@ -91,6 +95,29 @@ def extract_jsons_spyfall(text):
                 
     return objects
 
+
+def check_response_format(response, response_format, max_nb_words=None):
+    """
+    Checks whether a response is in the format its parser expects.
+
+    Parameters:
+        response (str): The response of a player.
+        response_format (str): "json" for a single JSON object (see extract_jsons), "bracket" for an answer between
+            square brackets, or "sentence" for a first sentence of at most `max_nb_words` spaces.
+        max_nb_words (int): The maximum number of spaces of the first sentence, for the "sentence" format.
+
+    Returns:
+        bool: True if the response is in the format, False otherwise.
+    """
+    if response_format == "bracket":
+        return re.search(r"\[(.*?)\]", response) is not None
+    elif response_format == "sentence":
+        return max_nb_words is None or response.split(".")[0].count(" ") <= max_nb_words
+    elif response_format == "json":
+        return len(extract_jsons(response)) == 1
+    raise ValueError(f"Unknown response format: {response_format}")
+
+
 def extract_code(text):
     """
     Extracts all code blocks encapsulated by '```' from a given string.
@@ -109,6 +136,29 @@ def extract_code(text):
     return parsed_codes
 
 
+@functools.lru_cache(maxsize=None)
+def _load_yaml(path: str, mtime: float):
+    with open(path, "r") as file:
+        return yaml.safe_load(file)
+
+
+def load_prompt_config(path: str) -> dict:
+    """
+    Loads a prompt config YAML file, parsed once per process.
+
+    The environments of every game read the same prompt configs: the parsed file is cached, and reloaded when
+    the file is modified. The returned dictionary is shared between the callers and must not be modified.
+
+    Parameters:
+        path (str): The path of the YAML file.
+
+    Returns:
+        dict: The parsed prompt config.
+    """
+    path = os.path.abspath(path)
+    return _load_yaml(path, os.path.getmtime(path))
+
+
 class AttributedDict(dict):
     """
     A dictionary class whose keys are automatically set as attributes of the class.
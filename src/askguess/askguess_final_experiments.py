@@ -14,10 +14,10 @@ sys.path.append(CHATARENA_PATH)
 # Loading dotenv
 load_dotenv()
 
-from chatarena.arena import Arena
-from chatarena.agent import Player
-from chatarena.backends import CohereAIChat
-from chatarena.environments.askguess import AskGuess
+from chatarena.arena import ArenaTemplate
+from chatarena.config import ArenaConfig
+from chatarena.backends.rate_limit import set_rate_limit
+from chatarena.experiment import run_sharded_experiments
 
 # Prompts yaml
 file_path = os.path.abspath(__file__)
@@ -37,43 +37,48 @@ with open(PROMPT_CONFIG_FILE) as file:
 
 prompt_mode = "final_baseline"
 
-backend = CohereAIChat(
-    temperature=prompts[prompt_mode]["temperature"],
-    max_tokens=prompts[prompt_mode]["max_tokens"],
-    model=prompts[prompt_mode]["model_name"],
-    preamble=prompts[prompt_mode]["preamble"],
+NB_EXPERIMENTS = 10
+MAX_CONCURRENCY = 8  # Number of games played at the same time by each worker
+NB_WORKERS = 4  # Number of worker processes
+COHERE_REQUESTS_PER_MINUTE = 20  # Rate limit of the Cohere key, shared by the workers
+SEED = 0  # Seed of the sweep: the words of each game only depend on it
+
+# Each worker process gets its share of the rate limit (see chatarena.backends.rate_limit)
+set_rate_limit("cohere", requests_per_minute=COHERE_REQUESTS_PER_MINUTE // NB_WORKERS)
+
+
+# The config is parsed once: every game gets new players, with their own Cohere backends (which keep the state of
+# their conversation), and a new environment
+arena_template = ArenaTemplate(
+    ArenaConfig(
+        players=[
+            {"name": name, "role_desc": role_description, "backend": {"backend_type": "cohere-chat"}}
+            for name in ["Paya", "Toto"]
+        ],
+        environment={
+            "env_type": "askguess",
+            "word_list": word_list,
+            "prompt_config_file": PROMPT_CONFIG_FILE,
+            "prompt_config_mode": prompt_mode,
+        },
+    )
 )
 
-print("\n\n", "-----------------------------------")
-print(f"PROMPT MODE:", prompt_mode, "\n\n")
-
-# Defining players
-paya = Player(name="Paya",
-                role_desc=role_description,
-                backend=CohereAIChat())
-
-toto = Player(name="Toto",
-                role_desc=role_description,
-                backend=CohereAIChat())
-
-for i in range(10):
-    # Running experiment
-    env = AskGuess(
-        player_names = ["Paya", "Toto"], 
-        word_list=word_list, 
-        prompt_config_file=PROMPT_CONFIG_FILE,
-        prompt_config_mode=prompt_mode,
-        )
-
-    arena = Arena([paya, toto], env)
-    arena.launch_cli(interactive=False, max_steps=20)
-
-    experiment_path = os.path.join(chat_history_path, prompt_mode)
-    if not os.path.exists(experiment_path):
-        os.mkdir(experiment_path)  # Create the directory if it doesn't exist
-
-    # Saving history
-    chat_path = os.path.join(
-        experiment_path, f"askguess_{strftime('%Y_%m_%d_%H_%M_%S')}.json"
+
+if __name__ == "__main__":
+    print("\n\n", "-----------------------------------")
+    print(f"PROMPT MODE:", prompt_mode, "\n\n")
+
+    # Saving the history of each game in chat_history/<prompt_mode>/
+    run_sharded_experiments(
+        arena_template,
+        NB_EXPERIMENTS,
+        num_workers=NB_WORKERS,
+        seed=SEED,
+        max_concurrency=MAX_CONCURRENCY,
+        max_steps=20,
+        output_dir=os.path.join(chat_history_path, prompt_mode),
+        prefix="askguess",
+        # A game that crashes is resumed from its last checkpoint when the script is run again
+        checkpoint_dir=os.path.join(chat_history_path, "checkpoints"),
     )
-    arena.save_chat(chat_path)
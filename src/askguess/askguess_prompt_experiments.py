@@ -70,7 +70,7 @@ for prompt_mode in PROMPT_MODES:
             )
 
         arena = Arena([paya, toto], env)
-        arena.launch_cli(interactive=False, max_steps=MAX_STEPS)
+        arena.run_episode(max_steps=MAX_STEPS)
 
         experiment_path = os.path.join(chat_history_path, prompt_mode)
         if not os.path.exists(experiment_path): os.mkdir(experiment_path) # Create the directory if it doesn't exist
@@ -15,6 +15,8 @@ from chatarena.arena import Arena
 from chatarena.agent import Player
 from chatarena.backends import CohereAIChat
 from chatarena.environments.spyfall import SpyFall
+from chatarena.backends.rate_limit import set_rate_limit
+from chatarena.experiment import game_seed, run_sharded_experiments
 
 file_path = os.path.abspath(__file__)
 dir_path = os.path.dirname(file_path)
@@ -36,10 +38,21 @@ with open(r"src\datasets\spyfall.json", "r") as fp:
 
 NB_EXPERIMENTS = 10
 MAX_STEPS = 48
+MAX_CONCURRENCY = 8  # Number of games played at the same time by each worker
+NB_WORKERS = 4  # Number of worker processes
+COHERE_REQUESTS_PER_MINUTE = 20  # Rate limit of the Cohere key, shared by the workers
+SEED = 0  # Seed of the sweep: the players and the words of each game only depend on it
+
+# Each worker process gets its share of the rate limit (see chatarena.backends.rate_limit)
+set_rate_limit("cohere", requests_per_minute=COHERE_REQUESTS_PER_MINUTE // NB_WORKERS)
+
 PROMPT_MODES = ["final_baseline", "command_r", "add_restrict_info", "low_temperature", "high_temperature", "sub_cot", "sub_preamble"]
+# Every (prompt mode, experiment) pair is one game of the sweep
+GRID = [(prompt_mode, i) for prompt_mode in PROMPT_MODES for i in range(NB_EXPERIMENTS)]
+
 
-for prompt_mode in PROMPT_MODES:
-    print(f"======================= Doing {prompt_mode} =======================")
+def make_arena(game_idx):
+    prompt_mode, _ = GRID[game_idx]
     # Defining players
     # First description of the game -> taken from GameEval
     role_description = prompts["role_description"].format(number_of_players=number_of_players)
@@ -47,6 +60,7 @@ for prompt_mode in PROMPT_MODES:
     format_specification = ""
 
     # If we remove the preamble, it becomes the role description, and we remove it from the backend. 
+    # Every game gets its own backend: the Cohere backend keeps the state of its conversation
     if prompt_mode == "sub_preamble":
         role_description = prompts[prompt_mode]["role_description"]
 
@@ -63,38 +77,47 @@ for prompt_mode in PROMPT_MODES:
         preamble=prompts[prompt_mode]["preamble"],
         )
 
-    for i in range(NB_EXPERIMENTS):
-        players = ["Nancy", "Tom", "Cindy", "Jack", "Rose", "Edward"]
-        random.shuffle(players)
-        players_list = [
-            Player(
-                name=players[i],
-                role_desc="Your name is "
-                + players[i]
-                + ","
-                + role_description,
-                backend=backend,
-            )
-            for i in range(number_of_players)
-        ]
-
-        # Running experiment
-        env = SpyFall(
-            player_names=players,
-            prompt_config_file=PROMPT_CONFIG_FILE,
-            prompt_config_mode=prompt_mode,
-            restrict_info=prompts[prompt_mode]["restrict_info"],
-            topic_codes = topic_codes
-        )
-        arena = Arena(players_list, env)
-        arena.launch_cli(interactive=False, max_steps=MAX_STEPS)
-
-        experiment_path = os.path.join(chat_history_path, prompt_mode)
-        if not os.path.exists(experiment_path):
-            os.mkdir(experiment_path)  # Create the directory if it doesn't exist
-
-        # Saving history
-        chat_path = os.path.join(
-            experiment_path, f"spyfall_{strftime('%Y_%m_%d_%H_%M_%S')}.json"
+    players = ["Nancy", "Tom", "Cindy", "Jack", "Rose", "Edward"]
+    # The games run concurrently: the order of the players is sampled from the seed of the game
+    random.Random(game_seed(SEED, game_idx)).shuffle(players)
+    players_list = [
+        Player(
+            name=players[i],
+            role_desc="Your name is "
+            + players[i]
+            + ","
+            + role_description,
+            backend=backend,
         )
-        arena.save_chat(chat_path)
+        for i in range(number_of_players)
+    ]
+
+    env = SpyFall(
+        player_names=players,
+        prompt_config_file=PROMPT_CONFIG_FILE,
+        prompt_config_mode=prompt_mode,
+        restrict_info=prompts[prompt_mode]["restrict_info"],
+        simultaneous_votes=prompts[prompt_mode].get("simultaneous_votes", False),
+        topic_codes = topic_codes
+    )
+    return Arena(players_list, env)
+
+
+def game_dir(game_idx):
+    return os.path.join(chat_history_path, GRID[game_idx][0])
+
+
+if __name__ == "__main__":
+    # Running experiments, saving the history of each game in chat_history/<prompt_mode>/
+    run_sharded_experiments(
+        make_arena,
+        len(GRID),
+        num_workers=NB_WORKERS,
+        seed=SEED,
+        max_concurrency=MAX_CONCURRENCY,
+        max_steps=MAX_STEPS,
+        output_dir=game_dir,
+        prefix="spyfall",
+        # A game that crashes is resumed from its last checkpoint when the script is run again
+        checkpoint_dir=os.path.join(chat_history_path, "checkpoints"),
+    )
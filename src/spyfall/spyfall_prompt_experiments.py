@@ -82,7 +82,7 @@ for prompt_mode in PROMPT_MODES:
             topic_codes = topic_codes
         )
         arena = Arena(players_list, env)
-        arena.launch_cli(interactive=False, max_steps=MAX_STEPS)
+        arena.run_episode(max_steps=MAX_STEPS)
 
         experiment_path = os.path.join(chat_history_path, prompt_mode)
         if not os.path.exists(experiment_path):
@@ -10,9 +10,7 @@ import yaml
 from time import strftime
 
 
-from chatarena.agent import Player
-from chatarena.backends import CohereAIChat, OpenAIChat, Claude
-from chatarena.environments.taboo import Taboo
+from chatarena.config import ArenaConfig
 import random
 
 
@@ -26,58 +24,76 @@ with open(PROMPT_CONFIG_FILE) as file:
 
 role_description = "You are a player in a word guessing game called ask-guess. "
 
-paya = Player(name="Paya",
-                role_desc=role_description,
-                backend=CohereAIChat())
+from chatarena.arena import ArenaTemplate
+from chatarena.backends.rate_limit import set_rate_limit
+from chatarena.experiment import run_sharded_experiments
 
-toto = Player(name="Toto",
-                role_desc=role_description,
-                backend=CohereAIChat())
+NB_EXPERIMENTS = 10
+MAX_STEPS = 20
+MAX_CONCURRENCY = 8  # Number of games played at the same time by each worker
+NB_WORKERS = 4  # Number of worker processes
+COHERE_REQUESTS_PER_MINUTE = 20  # Rate limit of the Cohere key, shared by the workers
+SEED = 0  # Seed of the sweep: the dataset and the words of each game only depend on it
+
+# Each worker process gets its share of the rate limit (see chatarena.backends.rate_limit)
+set_rate_limit("cohere", requests_per_minute=COHERE_REQUESTS_PER_MINUTE // NB_WORKERS)
 
-from chatarena.arena import Arena
 
-datasets = os.listdir(r"src\datasets\taboo")
-random_dataset = random.choice(datasets)
+# The worker processes import this script again: they must pick the same dataset
+datasets = sorted(os.listdir(r"src\datasets\taboo"))
+random_dataset = random.Random(SEED).choice(datasets)
 with open(rf"src\datasets\taboo\{random_dataset}", "r") as fp:
     taboo = json.load(fp)
 
 
-NB_EXPERIMENTS = 10
-MAX_STEPS = 20
 PROMPT_MODES = ["final_baseline"]
+# Every (prompt mode, experiment) pair is one game of the sweep
+GRID = [(prompt_mode, i) for prompt_mode in PROMPT_MODES for i in range(NB_EXPERIMENTS)]
 # ================= EXPERIMENTS ================
 
-for prompt_mode in PROMPT_MODES:
-    print(f"======================= Doing {prompt_mode} =======================")
-    
-    backend = CohereAIChat(
-        temperature=prompts[prompt_mode]["temperature"],
-        max_tokens=prompts[prompt_mode]["max_tokens"],
-        model=prompts[prompt_mode]["model_name"],
-        preamble=prompts[prompt_mode]["preamble"],
+
+def make_template(prompt_mode):
+    # The config is parsed once: every game gets new players, with their own Cohere backends (which keep the state
+    # of their conversation), and a new environment
+    return ArenaTemplate(
+        ArenaConfig(
+            players=[
+                {"name": name, "role_desc": role_description, "backend": {"backend_type": "cohere-chat"}}
+                for name in ["Paya", "Toto"]
+            ],
+            environment={
+                "env_type": "taboo",
+                "taboo": taboo,
+                "prompt_config_file": PROMPT_CONFIG_FILE,
+                "prompt_config_mode": prompt_mode,
+            },
+        )
     )
 
-    for i in range(NB_EXPERIMENTS):
-        print(f"Experiment {i}.")
 
-        # ====== Baseline =======
-        env = Taboo(
-            player_names = ["Paya", "Toto"], 
-            taboo = taboo, 
-            prompt_config_file=PROMPT_CONFIG_FILE,
-            prompt_config_mode=prompt_mode,
-            )
+TEMPLATES = {prompt_mode: make_template(prompt_mode) for prompt_mode in PROMPT_MODES}
 
-        arena = Arena([paya, toto], env)
-        arena.launch_cli(interactive=False, max_steps=MAX_STEPS)
 
-        experiment_path = os.path.join(chat_history_path, prompt_mode)
-        if not os.path.exists(experiment_path):
-            os.mkdir(experiment_path)  # Create the directory if it doesn't exist
+def make_arena(game_idx):
+    prompt_mode, _ = GRID[game_idx]
+    return TEMPLATES[prompt_mode](game_idx)
 
-        # Saving history
-        chat_path = os.path.join(
-            experiment_path, f"taboo_{strftime('%Y_%m_%d_%H_%M_%S')}.json"
-        )
-        arena.save_chat(chat_path)
 
+def game_dir(game_idx):
+    return os.path.join(chat_history_path, GRID[game_idx][0])
+
+
+if __name__ == "__main__":
+    # Saving the history of each game in chat_history/<prompt_mode>/
+    run_sharded_experiments(
+        make_arena,
+        len(GRID),
+        num_workers=NB_WORKERS,
+        seed=SEED,
+        max_concurrency=MAX_CONCURRENCY,
+        max_steps=MAX_STEPS,
+        output_dir=game_dir,
+        prefix="taboo",
+        # A game that crashes is resumed from its last checkpoint when the script is run again
+        checkpoint_dir=os.path.join(chat_history_path, "checkpoints"),
+    )
@@ -67,7 +67,7 @@ for prompt_mode in PROMPT_MODES:
             )
 
         arena = Arena([paya, toto], env)
-        arena.launch_cli(interactive=False, max_steps=MAX_STEPS)
+        arena.run_episode(max_steps=MAX_STEPS)
 
         # Saving history
         arena.save_chat(f"src/taboo/chat_history/{prompt_mode}/taboo_{strftime('%Y_%m_%d_%H_%M_%S')}.json")
@@ -0,0 +1,65 @@
+import sys
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+CHATARENA_PATH = os.getenv("CHATARENA_PATH")
+sys.path.append(CHATARENA_PATH)
+
+from time import perf_counter
+
+from chatarena import utils
+from chatarena.arena import Arena, ArenaTemplate
+from chatarena.config import ArenaConfig
+
+NB_ARENAS = 10_000
+NB_ARENAS_FROM_CONFIG = 1_000  # Parsing the prompt config for every arena is slow
+PLAYER_NAMES = ["Nancy", "Tom", "Cindy", "Jack", "Rose", "Edward"]
+PROMPT_CONFIG_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, "spyfall", "spyfall_final_experiments.yaml"
+)
+
+# The players have human backends, which do not need API keys: only the creation of the arenas is measured
+CONFIG = ArenaConfig(
+    players=[
+        {"name": name, "role_desc": f"Your name is {name}", "backend": {"backend_type": "human"}}
+        for name in PLAYER_NAMES
+    ],
+    environment={
+        "env_type": "spyfall",
+        "prompt_config_file": PROMPT_CONFIG_FILE,
+        "prompt_config_mode": "final_baseline",
+    },
+)
+
+
+def create_from_config(nb_arenas):
+    """Create the arenas with Arena.from_config, parsing the config and the prompt config for every game."""
+    arenas = []
+    for _ in range(nb_arenas):
+        utils._load_yaml.cache_clear()
+        arenas.append(Arena.from_config(CONFIG.deepcopy()))
+    return arenas
+
+
+def create_from_template(nb_arenas):
+    """Create the arenas from a template."""
+    template = ArenaTemplate(CONFIG)
+    return [template(game_idx) for game_idx in range(nb_arenas)]
+
+
+if __name__ == "__main__":
+    for create, nb_arenas in ((create_from_config, NB_ARENAS_FROM_CONFIG), (create_from_template, NB_ARENAS)):
+        # The template parses the prompt config once, as in a new worker process
+        utils._load_yaml.cache_clear()
+        start = perf_counter()
+        arenas = create(nb_arenas)
+        duration = perf_counter() - start
+        print(
+            f"{create.__name__}: {nb_arenas} arenas in {duration:.2f}s "
+            f"({duration / nb_arenas * 1e3:.3f} ms per arena)"
+        )
+
+    # The games of a template do not share their state
+    assert arenas[0].environment.message_pool is not arenas[1].environment.message_pool
+    assert arenas[0].players[0] is not arenas[1].players[0]
@@ -0,0 +1,132 @@
+import sys
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+CHATARENA_PATH = os.getenv("CHATARENA_PATH")
+sys.path.append(CHATARENA_PATH)
+
+import pickle
+import tempfile
+
+from chatarena.agent import Moderator, Player
+from chatarena.arena import Arena
+from chatarena.backends.base import IntelligenceBackend, register_backend
+from chatarena.environments.conversation import ModeratedConversation
+
+PLAYER_NAMES = ["Alice", "Bob", "Carol"]
+NB_PLAYER_MESSAGES = 24  # The moderator ends the conversation after this many player messages
+CRASH_AT_QUERY = 30  # The query of the crashing run that fails
+
+
+class Crash(Exception):
+    pass
+
+
+@register_backend
+class ScriptedBackend(IntelligenceBackend):
+    """Answers from the length of the history, and counts its queries: its count is its checkpointed state."""
+
+    stateful = False
+    type_name = "scripted"
+
+    def __init__(self, crash_at: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self.crash_at = crash_at
+        self.num_queries = 0
+
+    def get_state(self):
+        return {"num_queries": self.num_queries}
+
+    def set_state(self, state):
+        self.num_queries = state["num_queries"]
+
+    def query(self, agent_name, role_desc, history_messages, global_prompt=None, request_msg=None, *args, **kwargs):
+        self.num_queries += 1
+        if self.num_queries == self.crash_at:
+            raise Crash(f"{agent_name} crashed")
+        if request_msg is not None:  # The terminal condition of the moderator
+            num_player_messages = sum(m.agent_name in PLAYER_NAMES for m in history_messages)
+            return "yes" if num_player_messages >= NB_PLAYER_MESSAGES else "no"
+        return f"{agent_name} answers message {len(history_messages)}"
+
+
+def make_arena(pipeline_terminal_check, crash_at=None):
+    players = [Player(name=name, role_desc=f"You are {name}.", backend=ScriptedBackend()) for name in PLAYER_NAMES]
+    moderator = Moderator(
+        role_desc="You moderate the conversation.",
+        backend=ScriptedBackend(crash_at=crash_at),
+        terminal_condition="Is the conversation over?",
+    )
+    environment = ModeratedConversation(
+        player_names=PLAYER_NAMES, moderator=moderator, pipeline_terminal_check=pipeline_terminal_check
+    )
+    return Arena(players, environment)
+
+
+def play(arena, timestep):
+    while not timestep.terminal and arena.num_steps < 100:
+        timestep = arena.step()
+    return timestep
+
+
+def transcript(arena):
+    return [(m.agent_name, m.content, m.turn) for m in arena.environment.message_pool.get_all_messages()]
+
+
+def check(pipeline_terminal_check):
+    reference = make_arena(pipeline_terminal_check)
+    play(reference, reference.reset())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "game.ckpt")
+
+        # A game that crashes while the moderator is queried, checkpointed after every step
+        crashed = make_arena(pipeline_terminal_check, crash_at=CRASH_AT_QUERY)
+        crashed.checkpoint_path = path
+        try:
+            play(crashed, crashed.reset())
+        except Crash:
+            pass
+        assert not crashed.current_timestep.terminal, "The game ended before the crash"
+
+        # The checkpoint only holds the game state: every step appends its new messages, not the whole pool
+        records = Arena.read_checkpoint_records(path)
+        # A pipelined terminal check fails while its step is checkpointed, which then writes no record
+        assert len(records) == crashed.num_steps - pipeline_terminal_check
+        for record in records:
+            assert set(record["environment"]) == {"_current_turn", "_next_player_idx", "_moderator_terminal", "moderator"}
+            assert record["environment"]["moderator"]["backend"]["num_queries"] > 0
+        saved = [(m.agent_name, m.content, m.turn) for record in records for m in record["message_pool"]["messages"]]
+        assert saved == transcript(reference)[: len(saved)]
+        assert max(len(record["message_pool"]["messages"]) for record in records[1:]) <= 2
+
+        # A record truncated by a crash while appending it is ignored
+        with open(path, "ab") as f:
+            f.write(pickle.dumps(records[-1])[:100])
+
+        resumed = make_arena(pipeline_terminal_check)
+        resumed.checkpoint_path = path
+        timestep = play(resumed, resumed.resume(path))
+
+    assert timestep.terminal
+    assert transcript(resumed) == transcript(reference), "The resumed game diverged"
+    assert resumed.num_steps == reference.num_steps
+    # The moderator was not queried again for the steps before the checkpoint
+    assert resumed.environment.moderator.backend.num_queries == reference.environment.moderator.backend.num_queries
+    print(
+        f"pipeline_terminal_check={pipeline_terminal_check}: crashed at step {crashed.num_steps}, "
+        f"resumed to step {resumed.num_steps}, same transcript ({len(transcript(resumed))} messages)"
+    )
+
+    # The thread of the pipelined terminal checks is stopped when the game ends, or when a crashed game is reset
+    assert reference.environment._terminal_check_executor is None
+    assert resumed.environment._terminal_check_executor is None
+    crashed.reset()
+    assert crashed.environment._terminal_check_executor is None
+
+
+if __name__ == "__main__":
+    check(pipeline_terminal_check=False)
+    check(pipeline_terminal_check=True)
+    print("OK")
@@ -0,0 +1,86 @@
+import sys
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+CHATARENA_PATH = os.getenv("CHATARENA_PATH")
+sys.path.append(CHATARENA_PATH)
+
+import asyncio
+import random
+
+from chatarena.agent import Player
+from chatarena.arena import Arena
+from chatarena.backends.base import IntelligenceBackend, register_backend
+from chatarena.environments.spyfall import SpyFall
+from chatarena.experiment import game_seed, run_experiments, run_sharded_experiments
+
+PROMPT_CONFIG_FILE = os.path.join(CHATARENA_PATH, "src", "spyfall", "spyfall_final_experiments.yaml")
+PLAYER_NAMES = ["Nancy", "Tom", "Cindy", "Jack", "Rose", "Edward"]
+NB_GAMES = 12
+MAX_STEPS = 10
+SEED = 7
+
+
+@register_backend
+class JitteryBackend(IntelligenceBackend):
+    """Answers after a random delay drawn from the global generator, so that the concurrent games interleave."""
+
+    stateful = False
+    type_name = "jittery"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+    def query(self, agent_name, role_desc, history_messages, global_prompt=None, request_msg=None, *args, **kwargs):
+        names = [m.agent_name for m in history_messages if m.agent_name in PLAYER_NAMES]
+        if any("vote" in m.content.lower() for m in history_messages[-3:] if m.agent_name == "Moderator"):
+            return f"I believe that *{random.choice(names or PLAYER_NAMES)}* is the spy."
+        return f"It is something nice {random.randint(0, 100)}."
+
+    async def async_query(self, *args, **kwargs):
+        await asyncio.sleep(random.random() * 0.01)
+        return self.query(*args, **kwargs)
+
+
+def make_arena(game_idx):
+    player_names = list(PLAYER_NAMES)
+    random.Random(game_seed(SEED, game_idx)).shuffle(player_names)
+    backend = JitteryBackend()
+    players = [Player(name=name, role_desc=f"Your name is {name}", backend=backend) for name in player_names]
+    environment = SpyFall(
+        player_names=player_names,
+        prompt_config_file=PROMPT_CONFIG_FILE,
+        prompt_config_mode="final_baseline",
+    )
+    return Arena(players, environment)
+
+
+def dispositions(results):
+    assert all(result.error is None for result in results), [result.error for result in results]
+    return [(result.game_idx, result.disposition) for result in results]
+
+
+if __name__ == "__main__":
+    # The games sample from their own generators: the dispositions do not depend on how the games interleave
+    sequential = run_experiments(make_arena, NB_GAMES, max_concurrency=1, max_steps=MAX_STEPS, seed=SEED, verbose=False)
+    concurrent = run_experiments(make_arena, NB_GAMES, max_concurrency=8, max_steps=MAX_STEPS, seed=SEED, verbose=False)
+    sharded = run_sharded_experiments(
+        make_arena, NB_GAMES, num_workers=3, seed=SEED, max_concurrency=4, max_steps=MAX_STEPS, verbose=False
+    )
+    assert dispositions(sequential) == dispositions(concurrent) == dispositions(sharded)
+
+    # Resuming a game restores the generator of its environment, not the global one
+    arena = make_arena(0)
+    arena.environment.seed(SEED)
+    arena.checkpoint_path = os.path.join(CHATARENA_PATH, "src", "tests", "experiment_seeds.ckpt")
+    arena.run_episode(max_steps=MAX_STEPS)
+    resumed = make_arena(0)
+    resumed.environment.seed()
+    global_state = random.getstate()
+    resumed.resume(arena.checkpoint_path)
+    os.remove(arena.checkpoint_path)
+    assert random.getstate() == global_state
+    assert resumed.environment.rng.getstate() == arena.environment.rng.getstate()
+
+    print(f"OK: {NB_GAMES} games have the same dispositions whatever the concurrency and the number of workers")
@@ -0,0 +1,85 @@
+import sys
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+CHATARENA_PATH = os.getenv("CHATARENA_PATH")
+sys.path.append(CHATARENA_PATH)
+
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Union
+
+from chatarena.message import Message, MessagePool, _hash
+
+NB_MESSAGES = 100_000
+NB_GAMES = 10_000
+RULES = "You are playing SpyFall with {number_of_players} players. " * 40
+
+
+@dataclass
+class LegacyMessage:
+    """The original Message layout: a plain dataclass with an eager message_dict and a recomputed hash."""
+
+    agent_name: str
+    content: str
+    turn: int
+    word: str = None
+    timestamp: int = time.time_ns()
+    visible_to: Union[str, List[str]] = "all"
+    msg_type: str = "text"
+    logged: bool = False
+
+    def __post_init__(self):
+        self.message_dict = [{"role": self.agent_name, "message": self.content}]
+
+    @property
+    def msg_hash(self):
+        return _hash(
+            f"agent: {self.agent_name}\ncontent: {self.content}\ntimestamp: {str(self.timestamp)}\nturn: {self.turn}\nmsg_type: {self.msg_type}"
+        )
+
+
+def measure_pool(message_cls, contents):
+    """Measure the memory allocated to fill a pool with one message per content."""
+    tracemalloc.start()
+    pool = MessagePool()
+    for turn, content in enumerate(contents):
+        pool.append_message(
+            message_cls(agent_name=f"Player {turn % 6}", content=content, turn=turn)
+        )
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def measure_games(nb_games):
+    """Measure the memory of the pools of many games, whose moderators render the same rules."""
+    tracemalloc.start()
+    pools = []
+    for game in range(nb_games):
+        pool = MessagePool()
+        pool.append_message(
+            Message(agent_name="Moderator", content=RULES.format(number_of_players=6), turn=0)
+        )
+        pools.append(pool)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+if __name__ == "__main__":
+    # The contents are allocated beforehand: only the per-message overhead is measured
+    contents = [f"I think the word is related to clue number {i}." for i in range(NB_MESSAGES)]
+
+    legacy_size = measure_pool(LegacyMessage, contents)
+    slotted_size = measure_pool(Message, contents)
+
+    print(f"{NB_MESSAGES} messages in a MessagePool:")
+    print(f"    dataclass with message_dict: {legacy_size / 2**20:.1f} MiB")
+    print(f"    slotted Message:             {slotted_size / 2**20:.1f} MiB")
+    print(f"    saved:                       {1 - slotted_size / legacy_size:.0%}")
+
+    games_size = measure_games(NB_GAMES)
+    print(f"{NB_GAMES} games with {len(RULES)} characters of rules: {games_size / 2**20:.1f} MiB")
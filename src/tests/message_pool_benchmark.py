@@ -0,0 +1,78 @@
+import sys
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+CHATARENA_PATH = os.getenv("CHATARENA_PATH")
+sys.path.append(CHATARENA_PATH)
+
+import random
+from time import perf_counter
+
+from chatarena.message import Message, MessagePool
+
+# Game sizes to benchmark: (number of players, number of messages)
+GAME_SIZES = [(6, 1000), (6, 5000), (50, 1000), (50, 5000)]
+PRIVATE_MESSAGE_RATE = 0.2  # Share of the moderator messages sent to a subset of the players
+
+
+def naive_visible_messages(messages, agent_name, turn):
+    """The original MessagePool.get_visible_messages, used as a reference."""
+    prev_messages = [message for message in messages if message.turn <= turn]
+    return [
+        message
+        for message in prev_messages
+        if message.visible_to == "all"
+        or agent_name in message.visible_to
+        or agent_name == "Moderator"
+    ]
+
+
+def build_game(nb_players, nb_messages):
+    """Fill a pool the way a SpyFall game does: every player speaks in turn, the moderator sometimes whispers."""
+    players = [f"Player {i}" for i in range(nb_players)]
+    pool = MessagePool()
+    observations = []  # The (player, turn) lookups made during the game
+    for turn in range(nb_messages):
+        player = players[turn % nb_players]
+        if random.random() < PRIVATE_MESSAGE_RATE:
+            pool.append_message(
+                Message(
+                    agent_name="Moderator",
+                    content=f"Secret for turn {turn}",
+                    turn=turn,
+                    visible_to=random.sample(players, k=max(1, nb_players // 3)),
+                )
+            )
+        pool.append_message(Message(agent_name=player, content=f"Clue {turn}", turn=turn))
+        observations.append((players[(turn + 1) % nb_players], turn + 1))
+    return pool, observations
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for nb_players, nb_messages in GAME_SIZES:
+        pool, observations = build_game(nb_players, nb_messages)
+        messages = pool.get_all_messages()
+
+        start = perf_counter()
+        for player, turn in observations:
+            naive_visible_messages(messages, player, turn)
+        naive_time = perf_counter() - start
+
+        start = perf_counter()
+        for player, turn in observations:
+            pool.get_visible_messages(player, turn)
+        indexed_time = perf_counter() - start
+
+        # Both implementations must agree
+        for player, turn in observations[:: max(1, len(observations) // 50)]:
+            assert pool.get_visible_messages(player, turn) == naive_visible_messages(
+                messages, player, turn
+            )
+
+        print(
+            f"{nb_players:>3} players, {len(messages):>5} messages: "
+            f"scan {naive_time:.3f}s, indexed {indexed_time:.3f}s "
+            f"({naive_time / indexed_time:.1f}x)"
+        )
@@ -0,0 +1,101 @@
+import sys
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+CHATARENA_PATH = os.getenv("CHATARENA_PATH")
+sys.path.append(CHATARENA_PATH)
+
+import copy
+import random
+from time import perf_counter
+
+from chatarena.message import Message, MessagePool
+
+NB_MESSAGES = 50_000
+NB_BRANCHES = 20
+BRANCH_LENGTH = 200
+PLAYERS = [f"Player {i}" for i in range(6)]
+
+
+def random_message(rng, turn):
+    visible_to = rng.sample(PLAYERS, k=2) if rng.random() < 0.2 else "all"
+    return Message(
+        agent_name=rng.choice(PLAYERS),
+        content=f"Clue {rng.random()}",
+        turn=turn,
+        visible_to=visible_to,
+    )
+
+
+def rebuild(messages):
+    """Reference pool holding the same messages, filled from scratch."""
+    pool = MessagePool()
+    for message in messages:
+        pool.append_message(message)
+    return pool
+
+
+def check_same(pool, reference):
+    assert pool.get_all_messages() == reference.get_all_messages()
+    turn = pool.last_turn
+    for player in PLAYERS + ["Moderator"]:
+        assert pool.get_visible_messages(player, turn) == reference.get_visible_messages(player, turn)
+        assert pool.get_new_messages(player, 10, turn) == reference.get_new_messages(player, 10, turn)
+    # The forks share the hash index of the pool, without finding the messages of the other forks
+    messages = pool.get_all_messages()
+    visible = pool.get_visible_messages(PLAYERS[0], turn)
+    for message in messages[:: max(1, len(messages) // 100)]:
+        assert messages.find_hash(message.msg_hash) == reference.get_all_messages().find_hash(message.msg_hash)
+        assert visible.find_hash(message.msg_hash) == reference.get_visible_messages(PLAYERS[0], turn).find_hash(
+            message.msg_hash
+        )
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    pool = MessagePool()
+    for turn in range(NB_MESSAGES):
+        pool.append_message(random_message(rng, turn))
+    trunk = list(pool.get_all_messages())
+
+    start = perf_counter()
+    for _ in range(NB_BRANCHES):
+        copy.deepcopy(pool)
+    deepcopy_time = (perf_counter() - start) / NB_BRANCHES
+
+    pool.fork()  # The first fork moves the pool to chunked storage
+    start = perf_counter()
+    branches = [pool.fork() for _ in range(NB_BRANCHES)]
+    fork_time = (perf_counter() - start) / NB_BRANCHES
+
+    # Every branch explores its own continuation, including forks of forks
+    histories = []
+    for i, branch in enumerate(branches):
+        if i % 4 == 3:
+            branch = branches[i - 1].fork()
+            branches[i] = branch
+            history = histories[i - 1][:]
+        else:
+            history = trunk[:]
+        for turn in range(NB_MESSAGES + i * BRANCH_LENGTH, NB_MESSAGES + (i + 1) * BRANCH_LENGTH):
+            message = random_message(rng, turn)
+            branch.append_message(message)
+            history.append(message)
+        histories.append(history)
+
+    for turn in range(NB_MESSAGES, NB_MESSAGES + BRANCH_LENGTH):
+        pool.append_message(random_message(rng, turn))
+    assert pool.get_all_messages()[:NB_MESSAGES] == trunk
+
+    for branch, history in zip(branches, histories):
+        check_same(branch, rebuild(history))
+    check_same(pool, rebuild(pool.get_all_messages()))
+
+    # Resetting a fork does not affect the others
+    branches[0].reset()
+    assert branches[0].get_all_messages() == []
+    check_same(branches[1], rebuild(histories[1]))
+
+    print(f"{NB_MESSAGES} messages: deepcopy {deepcopy_time * 1000:.1f}ms, fork {fork_time * 1000:.3f}ms")
+    print(f"OK: {NB_BRANCHES} branches of {BRANCH_LENGTH} messages are independent")
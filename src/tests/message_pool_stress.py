@@ -0,0 +1,107 @@
+import sys
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+CHATARENA_PATH = os.getenv("CHATARENA_PATH")
+sys.path.append(CHATARENA_PATH)
+
+import random
+import tempfile
+import threading
+
+from chatarena.message import ConcurrentMessagePool, Message
+
+NB_PRODUCERS = 16
+NB_OBSERVERS = 8
+NB_MESSAGES_PER_PRODUCER = 2000
+MESSAGES_PER_TURN = 50  # In spill mode, the turn of a message is its number divided by this
+PLAYERS = [f"Player {i}" for i in range(NB_PRODUCERS)]
+
+
+def produce(pool, producer, start_event, spill):
+    """Append messages numbered 0..N-1, some of them only visible to a random subset of the players."""
+    rng = random.Random(producer)
+    start_event.wait()
+    for seq in range(NB_MESSAGES_PER_PRODUCER):
+        if rng.random() < 0.3:
+            visible_to = rng.sample(PLAYERS, k=3)
+        else:
+            visible_to = "all"
+        pool.append_message(
+            Message(
+                agent_name=PLAYERS[producer],
+                content=f"{producer}:{seq}",
+                turn=seq // MESSAGES_PER_TURN if spill else 0,
+                visible_to=visible_to,
+            )
+        )
+
+
+def observe(pool, agent_name, received, done_event, start_event):
+    """Read the new messages with a cursor until the producers are done, then read the remainder."""
+    cursor = 0
+    start_event.wait()
+    while True:
+        finished = done_event.is_set()
+        new_messages, cursor = pool.get_new_messages(agent_name, cursor)
+        received.extend(new_messages)
+        if finished:
+            break
+
+
+def check(pool, agent_name, received):
+    all_messages = pool.get_all_messages()
+    expected = [
+        m for m in all_messages if m.visible_to == "all" or agent_name in m.visible_to
+    ]
+    # Every visible message is received exactly once, in the order of the pool
+    assert received == expected, f"{agent_name} did not receive the pool order"
+    # The order of each producer is preserved
+    last_seq = {}
+    for m in received:
+        producer, seq = map(int, m.content.split(":"))
+        assert seq > last_seq.get(producer, -1), f"{agent_name} saw {m.content} out of order"
+        last_seq[producer] = seq
+    # Snapshot reads agree with the cursor reads
+    assert pool.get_visible_messages(agent_name, turn=NB_MESSAGES_PER_PRODUCER) == expected
+
+
+def run(pool, spill):
+    start_event, done_event = threading.Event(), threading.Event()
+    observers = {PLAYERS[i]: [] for i in range(NB_OBSERVERS)}
+
+    producer_threads = [
+        threading.Thread(target=produce, args=(pool, i, start_event, spill))
+        for i in range(NB_PRODUCERS)
+    ]
+    observer_threads = [
+        threading.Thread(
+            target=observe, args=(pool, name, received, done_event, start_event)
+        )
+        for name, received in observers.items()
+    ]
+    for thread in producer_threads + observer_threads:
+        thread.start()
+    start_event.set()
+    for thread in producer_threads:
+        thread.join()
+    done_event.set()
+    for thread in observer_threads:
+        thread.join()
+
+    assert len(pool.get_all_messages()) == NB_PRODUCERS * NB_MESSAGES_PER_PRODUCER
+    assert len({m.msg_hash for m in pool.get_all_messages()}) == len(pool.get_all_messages())
+    for name, received in observers.items():
+        check(pool, name, received)
+    print(
+        f"OK{' (spilling to disk)' if spill else ''}: {NB_PRODUCERS} producers x {NB_MESSAGES_PER_PRODUCER} messages, "
+        f"{NB_OBSERVERS} observers read consistent, ordered streams"
+    )
+
+
+if __name__ == "__main__":
+    run(ConcurrentMessagePool(), spill=False)
+    # The appends spill the oldest turns to disk while the observers read them
+    with tempfile.TemporaryDirectory() as spill_dir:
+        run(ConcurrentMessagePool(spill_dir=spill_dir, hot_turns=2), spill=True)
@@ -0,0 +1,82 @@
+import sys
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+CHATARENA_PATH = os.getenv("CHATARENA_PATH")
+sys.path.append(CHATARENA_PATH)
+
+import random
+
+from chatarena.agent import Player
+from chatarena.arena import Arena
+from chatarena.backends.base import IntelligenceBackend, register_backend
+from chatarena.environments.spyfall import SpyFall
+
+PROMPT_CONFIG_FILE = os.path.join(CHATARENA_PATH, "src", "spyfall", "spyfall_final_experiments.yaml")
+PLAYER_NAMES = ["Nancy", "Tom", "Cindy", "Jack", "Rose", "Edward"]
+MAX_STEPS = 48
+
+
+@register_backend
+class SessionBackend(IntelligenceBackend):
+    """A stateful backend that, like the Cohere session, keeps every message it was sent in one conversation."""
+
+    stateful = True
+    type_name = "session"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.reset()
+
+    def reset(self):
+        self.received = []  # The messages sent to the session, in order
+        self.num_new_messages = []  # The number of new messages sent with each query
+
+    def query(self, agent_name, role_desc, history_messages, global_prompt=None, request_msg=None, new_messages=None,
+              *args, **kwargs):
+        for message in new_messages:
+            assert all(message is not received for received in self.received), (
+                f"{message.content!r} was already sent to the session"
+            )
+        self.received.extend(new_messages)
+        self.num_new_messages.append(len(new_messages))
+
+        names = [m.agent_name for m in history_messages if m.agent_name in PLAYER_NAMES]
+        if "vote" in history_messages[-1].content.lower() or any(
+            "vote" in m.content.lower() for m in history_messages[-3:] if m.agent_name == "Moderator"
+        ):
+            return f"I believe that *{random.choice(names or PLAYER_NAMES)}* is the spy."
+        return f"It is something nice {random.randint(0, 100)}."
+
+
+def check(simultaneous_votes):
+    random.seed(0)
+    backend = SessionBackend()
+    # As in spyfall_final_experiments.py, all the players of the game share the backend
+    players = [Player(name=name, role_desc=f"Your name is {name}", backend=backend) for name in PLAYER_NAMES]
+    environment = SpyFall(
+        player_names=list(PLAYER_NAMES),
+        prompt_config_file=PROMPT_CONFIG_FILE,
+        prompt_config_mode="final_baseline",
+        simultaneous_votes=simultaneous_votes,
+    )
+    arena = Arena(players, environment)
+    arena.run_episode(max_steps=MAX_STEPS)
+
+    # Each query only sends the messages appended since the previous query of any player
+    all_messages = list(environment.message_pool.get_history())
+    assert [all_messages.index(m) for m in backend.received] == sorted(
+        all_messages.index(m) for m in backend.received
+    )
+    assert max(backend.num_new_messages) <= len(PLAYER_NAMES), backend.num_new_messages
+    print(
+        f"simultaneous_votes={simultaneous_votes}: {len(backend.num_new_messages)} queries, "
+        f"new messages per query: {backend.num_new_messages}"
+    )
+
+
+if __name__ == "__main__":
+    check(simultaneous_votes=False)
+    check(simultaneous_votes=True)
+    print("OK")